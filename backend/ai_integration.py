@@ -1,22 +1,17 @@
-from groq import Groq
-import os
+import asyncio
 from typing import Dict, Any, List
 import json
 from rag_system import rag
+from llm_client import llm_client
+from pattern_pipeline import pattern_pipeline
 
-def get_client():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY not set")
-    return Groq(api_key=api_key)
-
-async def analyze_message(message: str, case_context: Dict[str, Any]) -> Dict[str, Any]:
+async def analyze_message(message: str, case_context: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
     # Find similar past cases for context
-    similar_cases = rag.find_similar_cases({
+    similar_cases = await asyncio.to_thread(rag.find_similar_cases, {
         'financial_snapshot': case_context,
         'categories': ['rent'],  # would come from case
         'urgency': 'critical'
-    }, n_results=2)
+    }, n_results=2, success=True)
     
     past_cases_context = ""
     if similar_cases and similar_cases['documents']:
@@ -40,21 +35,14 @@ Return ONLY valid JSON:
 }}"""
 
     try:
-        client = get_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=800
-        )
-        content = response.choices[0].message.content.strip()
+        content = await llm_client.complete(prompt, max_tokens=800, temperature=0.7, bypass_cache=bypass_cache)
         content = content.replace("```json", "").replace("```", "").strip()
         return json.loads(content)
     except Exception as e:
         print(f"Error: {e}")
         return {"urgency": "medium", "categories": ["other"], "sentiment": "anxious", "priority_score": 5, "reasoning": "Error", "suggested_response": "Let me help.", "red_flags": []}
 
-async def recommend_resources(case_context: Dict[str, Any], resources: List[Dict[str, Any]], limit: int = 5) -> List[Dict[str, Any]]:
+async def recommend_resources(case_context: Dict[str, Any], resources: List[Dict[str, Any]], limit: int = 5, bypass_cache: bool = False) -> List[Dict[str, Any]]:
     # Build search query from case context
     search_query = f"""
     Need financial help. Income ${case_context.get('annual_income')}, credit score {case_context.get('credit_score')}.
@@ -64,7 +52,7 @@ async def recommend_resources(case_context: Dict[str, Any], resources: List[Dict
     """
     
     # RAG SEMANTIC SEARCH - finds resources even if exact keywords don't match
-    vector_results = rag.search_resources(search_query, n_results=8)
+    vector_results = await asyncio.to_thread(rag.search_resources, search_query, n_results=8)
     
     # Get the actual resource IDs from vector search
     top_resource_ids = vector_results['ids'][0] if vector_results['ids'] else []
@@ -91,19 +79,14 @@ Rank top {limit} as JSON array. Use the similarity scores to guide your ranking:
 [{{"resource_id": "res_1", "relevance_score": 0.9, "reasoning": "specific reason with timing/amount/eligibility", "estimated_success": 0.8}}]"""
 
     try:
-        client = get_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        content = response.choices[0].message.content.strip().replace("```json", "").replace("```", "").strip()
+        content = await llm_client.complete(prompt, max_tokens=1000, bypass_cache=bypass_cache)
+        content = content.replace("```json", "").replace("```", "").strip()
         return json.loads(content)
     except Exception as e:
         print(f"Error: {e}")
         return []
 
-async def suggest_response(case_context: Dict[str, Any], partial_message: str) -> Dict[str, Any]:
+async def suggest_response(case_context: Dict[str, Any], partial_message: str, bypass_cache: bool = False) -> Dict[str, Any]:
     if len(partial_message) < 10:
         return {}
     
@@ -113,29 +96,13 @@ Case: {case_context.get('urgency')}
 Suggest as JSON: {{"empathy_check": "", "questions_to_ask": [], "red_flags": [], "next_steps": []}}"""
 
     try:
-        client = get_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=400
-        )
-        content = response.choices[0].message.content.strip().replace("```json", "").replace("```", "").strip()
+        content = await llm_client.complete(prompt, max_tokens=400, bypass_cache=bypass_cache)
+        content = content.replace("```json", "").replace("```", "").strip()
         return json.loads(content)
     except Exception as e:
         print(f"Error: {e}")
         return {}
 
-async def detect_patterns(cases: List[Dict[str, Any]]) -> Dict[str, Any]:
-    prompt = f"""Analyze {len(cases)} cases for patterns. Return JSON with insights and trends."""
-    try:
-        client = get_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        content = response.choices[0].message.content.strip().replace("```json", "").replace("```", "").strip()
-        return json.loads(content)
-    except Exception as e:
-        print(f"Error: {e}")
-        return {"insights": [], "trends": {}}
+async def detect_patterns(cases: List[Dict[str, Any]], bypass_cache: bool = False) -> Dict[str, Any]:
+    # Map-reduce over chunks of the caseload, see pattern_pipeline.py
+    return await pattern_pipeline.detect(cases, bypass_cache=bypass_cache)
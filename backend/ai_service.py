@@ -5,8 +5,11 @@ Supports mock mode and real Anthropic API
 
 import os
 import json
+import asyncio
 from typing import Dict, List, Any
 from dotenv import load_dotenv
+from llm_cache import llm_cache
+from prompt_builder import prompt_builder
 
 load_dotenv()
 
@@ -20,7 +23,23 @@ if USE_REAL_AI:
 class AIService:
     
     @staticmethod
-    async def triage_message(message: str, employee_context: dict) -> dict:
+    async def _complete(prompt: str, max_tokens: int, bypass_cache: bool = False) -> str:
+        """Anthropic completion, served from llm_cache for repeated prompts"""
+
+        async def call() -> str:
+            response = await asyncio.to_thread(
+                client.messages.create,
+                model=MODEL,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text
+
+        key = llm_cache.fingerprint(MODEL, prompt, max_tokens=max_tokens)
+        return await llm_cache.get_or_call(key, call, bypass=bypass_cache)
+    
+    @staticmethod
+    async def triage_message(message: str, employee_context: dict, bypass_cache: bool = False) -> dict:
         """Analyze message for urgency, categories, sentiment"""
         
         if not USE_REAL_AI:
@@ -53,28 +72,24 @@ Analyze this and respond with ONLY a JSON object (no markdown, no explanation):
   "red_flags": ["eviction with children", "tight deadline"]
 }}"""
 
-        response = client.messages.create(
-            model=MODEL,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = await AIService._complete(prompt, 1024, bypass_cache)
         
-        return json.loads(response.content[0].text)
+        return json.loads(text)
     
     @staticmethod
-    async def recommend_resources(case_data: dict, resources: List[dict]) -> List[dict]:
+    async def recommend_resources(case_data: dict, resources: List[dict], bypass_cache: bool = False) -> List[dict]:
         """Rank resources using LLM"""
         
         if not USE_REAL_AI:
             return AIService._mock_recommendations()
         
-        prompt = f"""You are helping a Financial Assistant find resources for this employee:
+        template = """You are helping a Financial Assistant find resources for this employee:
 
 Employee Situation:
-{json.dumps(case_data, indent=2)}
+{case}
 
-Available Resources:
-{json.dumps(resources, indent=2)}
+Available Resources (pre-selected by relevance):
+{resources}
 
 Rank the top 5 resources. Respond with ONLY a JSON array:
 [
@@ -86,17 +101,14 @@ Rank the top 5 resources. Respond with ONLY a JSON array:
     "action_items": ["step 1", "step 2"]
   }}
 ]"""
+        prompt = await asyncio.to_thread(prompt_builder.recommend_prompt, case_data, resources, template)
 
-        response = client.messages.create(
-            model=MODEL,
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = await AIService._complete(prompt, 2048, bypass_cache)
         
-        return json.loads(response.content[0].text)
+        return json.loads(text)
     
     @staticmethod
-    async def suggest_response(case_context: dict, partial_message: str) -> dict:
+    async def suggest_response(case_context: dict, partial_message: str, bypass_cache: bool = False) -> dict:
         """Real-time conversation suggestions"""
         
         if not USE_REAL_AI:
@@ -118,24 +130,20 @@ Provide suggestions as JSON:
   "tone_suggestion": "Brief note on tone if needed"
 }}"""
 
-        response = client.messages.create(
-            model=MODEL,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = await AIService._complete(prompt, 1024, bypass_cache)
         
-        return json.loads(response.content[0].text)
+        return json.loads(text)
     
     @staticmethod
-    async def detect_patterns(cases: List[dict]) -> dict:
+    async def detect_patterns(cases: List[dict], bypass_cache: bool = False) -> dict:
         """Analyze all cases for systemic patterns"""
         
         if not USE_REAL_AI:
             return AIService._mock_patterns()
         
-        prompt = f"""Analyze these financial assistance cases for patterns:
+        template = """Analyze this summary of the financial assistance caseload for patterns:
 
-{json.dumps(cases, indent=2)}
+{summary}
 
 Find patterns and respond with JSON:
 {{
@@ -154,14 +162,11 @@ Find patterns and respond with JSON:
     "stable": ["category names"]
   }}
 }}"""
+        prompt = await asyncio.to_thread(prompt_builder.patterns_prompt, cases, template)
 
-        response = client.messages.create(
-            model=MODEL,
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = await AIService._complete(prompt, 2048, bypass_cache)
         
-        return json.loads(response.content[0].text)
+        return json.loads(text)
     
     # Mock responses for development
     @staticmethod
@@ -0,0 +1,104 @@
+"""
+Analytics - incrementally maintained aggregates over the caseload
+Kept in sync by CaseStore events so dashboard endpoints read in O(1)
+"""
+
+from collections import Counter
+from typing import Dict, List, Any, Iterable
+
+URGENT_LEVELS = ("critical", "high")
+
+
+class CaseAggregates:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total_cases = 0
+        self.urgency_counts: Counter = Counter()
+        self.category_counts: Counter = Counter()
+        self.debt_sum = 0
+        self.income_sum = 0
+        self.credit_sum = 0
+        self.total_documents = 0
+
+    # CaseStore listener interface
+    def on_case_added(self, case: Dict[str, Any]):
+        self._apply(case, 1)
+
+    def on_case_removed(self, case: Dict[str, Any]):
+        self._apply(case, -1)
+
+    def on_document_added(self, count: int = 1):
+        self.total_documents += count
+
+    def _apply(self, case: Dict[str, Any], sign: int):
+        snapshot = case.get("financial_snapshot") or {}
+
+        self.total_cases += sign
+        self._bump(self.urgency_counts, case.get("urgency"), sign)
+        for category in case.get("categories", []):
+            self._bump(self.category_counts, category, sign)
+
+        self.debt_sum += sign * snapshot.get("total_debt", 0)
+        self.income_sum += sign * snapshot.get("annual_income", 0)
+        self.credit_sum += sign * snapshot.get("credit_score", 0)
+
+    @staticmethod
+    def _bump(counter: Counter, key: Any, sign: int):
+        if key is None:
+            return
+        counter[key] += sign
+        # Drop empty keys so the counters only describe live cases
+        if counter[key] <= 0:
+            del counter[key]
+
+    # Read side
+    def urgent_cases(self) -> int:
+        return sum(self.urgency_counts.get(level, 0) for level in URGENT_LEVELS)
+
+    def averages(self) -> Dict[str, float]:
+        if not self.total_cases:
+            return {"debt": 0, "income": 0, "credit": 0}
+        return {
+            "debt": self.debt_sum / self.total_cases,
+            "income": self.income_sum / self.total_cases,
+            "credit": self.credit_sum / self.total_cases,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total_cases": self.total_cases,
+            "urgency_counts": dict(self.urgency_counts),
+            "category_counts": dict(self.category_counts),
+            "debt_sum": self.debt_sum,
+            "income_sum": self.income_sum,
+            "credit_sum": self.credit_sum,
+            "total_documents": self.total_documents,
+        }
+
+    # Verification
+    @classmethod
+    def rebuild(cls, cases: Iterable[Dict[str, Any]], total_documents: int = 0) -> "CaseAggregates":
+        """Compute aggregates from scratch with a full scan"""
+        aggregates = cls()
+        for case in cases:
+            aggregates.on_case_added(case)
+        aggregates.total_documents = total_documents
+        return aggregates
+
+    def verify(self, cases: List[Dict[str, Any]], total_documents: int = 0) -> Dict[str, Any]:
+        """Compare the running aggregates against a full rebuild"""
+        expected = self.rebuild(cases, total_documents).snapshot()
+        actual = self.snapshot()
+        mismatches = {
+            key: {"incremental": actual[key], "rebuilt": expected[key]}
+            for key in expected
+            if actual[key] != expected[key]
+        }
+        return {"consistent": not mismatches, "mismatches": mismatches}
+
+
+# Global instance
+case_aggregates = CaseAggregates()
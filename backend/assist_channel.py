@@ -0,0 +1,100 @@
+"""
+Assist Channel - debounced, latest-draft-wins conversation assist
+A newer draft cancels the pending or running computation for the older one
+"""
+
+import os
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+ASSIST_DEBOUNCE_MS = int(os.getenv("ASSIST_DEBOUNCE_MS", "300"))
+# Also ask the LLM (ai_integration.suggest_response) on top of the rule checks
+ASSIST_USE_LLM = os.getenv("ASSIST_USE_LLM", "false").lower() == "true"
+
+AssistCompute = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class AssistChannel:
+    """Runs compute(draft) for the most recent draft only
+
+    Each submit waits out the debounce window before computing. If another
+    draft arrives first, the earlier task is cancelled (mid-sleep or
+    mid-LLM-call) and its submit returns None.
+    """
+
+    def __init__(self, compute: AssistCompute, debounce_seconds: float = ASSIST_DEBOUNCE_MS / 1000):
+        self.compute = compute
+        self.debounce_seconds = debounce_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+
+    async def _run(self, draft: str, debounce: bool) -> Dict[str, Any]:
+        if debounce and self.debounce_seconds > 0:
+            await asyncio.sleep(self.debounce_seconds)
+        return await self.compute(draft)
+
+    async def submit(self, draft: str, debounce: bool = True) -> Optional[Dict[str, Any]]:
+        """Result for this draft, or None if a newer draft superseded it"""
+        self.submitted += 1
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            self.superseded += 1
+
+        task = asyncio.create_task(self._run(draft, debounce))
+        self._task = task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # The caller went away - stop the work unless a newer draft owns it
+            task.cancel()
+            raise
+
+        if task.cancelled():
+            return None
+        self.completed += 1
+        return task.result()
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "superseded": self.superseded,
+            "completed": self.completed,
+            "debounce_ms": int(self.debounce_seconds * 1000)
+        }
+
+
+class AssistHub:
+    """One AssistChannel per case for the request/response endpoint"""
+
+    def __init__(self, debounce_seconds: float = ASSIST_DEBOUNCE_MS / 1000):
+        self.debounce_seconds = debounce_seconds
+        self._channels: Dict[str, AssistChannel] = {}
+
+    def channel(self, case_id: str, compute: AssistCompute) -> AssistChannel:
+        channel = self._channels.get(case_id)
+        if channel is None:
+            channel = AssistChannel(compute, self.debounce_seconds)
+            self._channels[case_id] = channel
+        return channel
+
+    def discard(self, case_id: str):
+        channel = self._channels.pop(case_id, None)
+        if channel is not None:
+            channel.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        totals = {"channels": len(self._channels), "submitted": 0, "superseded": 0, "completed": 0}
+        for channel in self._channels.values():
+            for field in ("submitted", "superseded", "completed"):
+                totals[field] += getattr(channel, field)
+        return totals
+
+
+# Global instance
+assist_hub = AssistHub()
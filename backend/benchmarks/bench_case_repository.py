@@ -0,0 +1,92 @@
+"""
+Benchmark: case repository on SQLite - seeding and listing
+Seeding: one session.add per row vs bulk_seed (one executemany per table).
+Listing: lazy relationship loading (1 + 2N queries) vs the repository's
+selectinload (a fixed number of queries), with statement counts.
+
+Run from backend/:  python benchmarks/bench_case_repository.py [n_cases] [messages_per_case]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+from database import create_db_engine, init_db, Case, Message
+from repository import CaseRepository
+
+
+def make_cases(n: int, per_case: int) -> list:
+    return [
+        {
+            "id": f"bench_case_{i}",
+            "employee_name": f"Employee {i}",
+            "employer": f"Employer {i % 50}",
+            "urgency": ["critical", "high", "medium"][i % 3],
+            "categories": ["housing", "utilities"],
+            "status": "active",
+            "financial_snapshot": {"annual_income": 30000 + i, "credit_score": 600},
+            "open_actions": [],
+            "messages": [
+                {"id": f"bench_case_{i}_msg_{j}", "sender": "employee", "content": f"Message {j} from case {i}"}
+                for j in range(per_case)
+            ]
+        }
+        for i in range(n)
+    ]
+
+
+def fresh_repository():
+    engine = create_db_engine("sqlite://")
+    init_db(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+    return CaseRepository(sessionmaker(bind=engine, expire_on_commit=False)), statements
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    per_case = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cases = make_cases(n, per_case)
+
+    repository, _ = fresh_repository()
+    start = time.perf_counter()
+    with repository.session() as session:
+        for case in cases:
+            session.add(Case(**repository._case_row(case)))
+            for message in case["messages"]:
+                session.add(Message(**repository._message_row(case["id"], message)))
+    per_row = time.perf_counter() - start
+
+    repository, statements = fresh_repository()
+    start = time.perf_counter()
+    repository.bulk_seed(cases)
+    bulk = time.perf_counter() - start
+
+    statements.clear()
+    start = time.perf_counter()
+    with repository.session() as session:
+        lazy = [
+            (case.id, len(case.messages), len(case.documents))
+            for case in session.scalars(select(Case))
+        ]
+    lazy_time, lazy_queries = time.perf_counter() - start, len(statements)
+
+    statements.clear()
+    start = time.perf_counter()
+    eager = repository.list()
+    eager_time, eager_queries = time.perf_counter() - start, len(statements)
+    assert len(lazy) == len(eager)
+
+    print(f"cases: {n}, messages per case: {per_case}")
+    print(f"  seed per-row: {per_row:.2f}s")
+    print(f"  seed bulk:    {bulk:.2f}s ({per_row / bulk:.1f}x)")
+    print(f"  list lazy:    {lazy_time:.2f}s, {lazy_queries} queries")
+    print(f"  list eager:   {eager_time:.2f}s, {eager_queries} queries")
+
+
+if __name__ == "__main__":
+    main()
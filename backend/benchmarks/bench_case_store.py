@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: case lookup by id, list scan vs CaseStore
+
+Run from backend/:  python benchmarks/bench_case_store.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from case_store import CaseStore
+
+SIZES = [1_000, 10_000, 100_000]
+LOOKUPS = 1_000
+URGENCIES = ["critical", "high", "medium", "low"]
+CATEGORIES = ["housing", "utilities", "medical", "debt", "employment"]
+
+
+def make_case(i: int) -> dict:
+    return {
+        "id": f"case_{i}",
+        "employee_name": f"Employee {i}",
+        "employer": f"Employer {i % 50}",
+        "urgency": URGENCIES[i % len(URGENCIES)],
+        "categories": [CATEGORIES[i % len(CATEGORIES)]],
+        "status": "active",
+        "financial_snapshot": {"annual_income": 40000, "credit_score": 620},
+        "messages": [],
+    }
+
+
+def main():
+    print(f"{'cases':>10} {'list scan (us)':>16} {'CaseStore (us)':>16} {'find() (us)':>14}")
+    for size in SIZES:
+        cases = [make_case(i) for i in range(size)]
+        store = CaseStore()
+        for case in cases:
+            store.add(case)
+
+        ids = [f"case_{random.randrange(size)}" for _ in range(LOOKUPS)]
+
+        scan = timeit.timeit(
+            lambda: [next((c for c in cases if c["id"] == case_id), None) for case_id in ids],
+            number=1,
+        )
+        indexed = timeit.timeit(lambda: [store.get(case_id) for case_id in ids], number=1)
+        find = timeit.timeit(
+            lambda: store.find(urgency="critical", employer="Employer 7"),
+            number=LOOKUPS,
+        )
+
+        print(
+            f"{size:>10} {scan / LOOKUPS * 1e6:>16.2f} "
+            f"{indexed / LOOKUPS * 1e6:>16.3f} {find / LOOKUPS * 1e6:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
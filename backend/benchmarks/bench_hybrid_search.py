@@ -0,0 +1,93 @@
+"""
+Benchmark: vector vs BM25 vs hybrid (RRF) resource retrieval - recall and latency
+Offline: labelled queries with a known relevant resource, run against
+  - the seeded resources (program names, acronyms, free-text needs)
+  - a synthetic catalog of n_synthetic resources, queried by program
+    name, unfiltered and with the category / location prefilter
+Recall@k is the share of queries whose relevant resource is in the top k.
+
+Run from backend/:  python benchmarks/bench_hybrid_search.py [k] [n_synthetic] [n_queries]
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+from benchmarks.bench_rag_ingestion import make_resources, fresh_rag
+
+SEEDED_QUERIES = [
+    ("ERAP", "res_1", {}),
+    ("LIHEAP application", "res_2", {}),
+    ("Salvation Army", "res_3", {}),
+    ("call 211 for help with the power bill", "res_4", {}),
+    ("Catholic Charities", "res_5", {}),
+    ("hospital bills after surgery", "res_6", {}),
+    ("behind on rent, landlord filed eviction", "res_1", {"category": "housing"}),
+    ("electricity shut off notice", "res_2", {"category": "utilities", "location": "National"}),
+]
+
+
+def synthetic_queries(resources: list, n_queries: int) -> list:
+    rng = random.Random(11)
+    queries = []
+    for resource in rng.sample(resources, min(n_queries, len(resources))):
+        queries.append((resource["name"], resource["id"], {}))
+        queries.append((
+            f"{resource['name'].split()[-1]} {resource['category']} help",
+            resource["id"],
+            {"category": resource["category"], "location": resource["location"]}
+        ))
+    return queries
+
+
+def run_mode(rag, mode: str, query: str, k: int, filters: dict) -> list:
+    if mode == "vector":
+        # Dense only, with the same prefilter as the hybrid path
+        clauses = [{key: value} for key, value in filters.items()]
+        where = clauses[0] if len(clauses) == 1 else ({"$and": clauses} if clauses else None)
+        return rag.resources_collection.query(
+            query_embeddings=[rag.embed_text(query)], n_results=k, where=where
+        )["ids"][0]
+    if mode == "bm25":
+        allowed = rag.bm25.filter_ids(**filters)
+        return [rid for rid, _ in rag.bm25.search(query, k, allowed)]
+    return rag.hybrid_search(query, k, **filters)["ids"][0]
+
+
+def evaluate(label: str, resources: list, queries: list, k: int):
+    rag = fresh_rag()
+    start = time.perf_counter()
+    rag.sync_resources(resources)
+    print(f"{label}: {len(resources)} resources indexed in {time.perf_counter() - start:.2f}s, {len(queries)} queries")
+
+    for mode in ("vector", "bm25", "hybrid"):
+        rag.embedding_cache.invalidate()
+        hits, latencies = 0, []
+        for query, relevant, filters in queries:
+            started = time.perf_counter()
+            ids = run_mode(rag, mode, query, k, filters)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += relevant in ids
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  {mode:<7} recall@{k} {hits / len(queries):.2f}  "
+              f"mean {statistics.mean(latencies):6.2f}ms  p95 {p95:6.2f}ms")
+
+
+def main_bench():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_synthetic = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    evaluate("seeded", main.financial_resources, SEEDED_QUERIES, k)
+    resources = make_resources(n_synthetic)
+    evaluate(f"synthetic x{n_synthetic}", resources, synthetic_queries(resources, n_queries), k)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,60 @@
+"""
+Benchmark: cold-start import time of rag_system and main
+Each measurement is a fresh interpreter. The embedder and vector store
+are lazy, so importing must not load them; warm_up is timed separately.
+Exits non-zero if `import main` exceeds the budget, to guard cold start.
+
+Run from backend/:  python benchmarks/bench_import.py [budget_seconds]
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+RUNS = 3
+
+PROBE = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+import rag_system
+loaded = rag_system.embedder.ready or rag_system.vector_store.ready
+rag_system.rag.warm_up()
+warm = time.perf_counter()
+print(f"{{imported - start:.3f}} {{warm - imported:.3f}} {{int(loaded)}}")
+"""
+
+
+def measure(module: str) -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)], cwd=BACKEND,
+        capture_output=True, text=True, check=True
+    ).stdout
+    imported, warm, loaded = out.strip().splitlines()[-1].split()
+    return float(imported), float(warm), loaded == "1"
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    failed = False
+
+    print(f"{'module':<12} {'import (best of ' + str(RUNS) + ')':>20} {'warm_up':>9}")
+    for module in ("rag_system", "main"):
+        runs = [measure(module) for _ in range(RUNS)]
+        imported = min(r[0] for r in runs)
+        warm = min(r[1] for r in runs)
+        print(f"{module:<12} {imported:>19.2f}s {warm:>8.2f}s")
+        if any(r[2] for r in runs):
+            print(f"  FAIL: importing {module} loaded the embedder or vector store")
+            failed = True
+        if module == "main" and imported > budget:
+            print(f"  FAIL: import main took {imported:.2f}s, budget {budget:.2f}s")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
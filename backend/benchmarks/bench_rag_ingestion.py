@@ -0,0 +1,69 @@
+"""
+Benchmark: per-item vs bulk resource ingestion into RAGSystem
+
+Run from backend/:  python benchmarks/bench_rag_ingestion.py [n_resources] [batch_size]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import rag_system
+from rag_system import RAGSystem
+
+CATEGORIES = ["housing", "utilities", "emergency", "medical", "debt", "food"]
+
+
+def make_resources(n: int) -> list:
+    return [
+        {
+            "id": f"bench_res_{i}",
+            "name": f"Assistance Program {i}",
+            "description": f"Helps households with {CATEGORIES[i % len(CATEGORIES)]} costs, program {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "eligibility_criteria": f"Income below {100 + (i % 5) * 50}% federal poverty level",
+            "max_amount": 500 + (i % 20) * 250,
+            "typical_approval_time": f"{1 + i % 4}-{2 + i % 4} weeks",
+            "application_difficulty": "easy",
+            "success_rate": 0.5 + (i % 50) / 100,
+            "location": "National" if i % 2 else "Local",
+        }
+        for i in range(n)
+    ]
+
+
+def fresh_rag() -> RAGSystem:
+    for name in ("financial_resources", "past_cases"):
+        try:
+            rag_system.vector_store.get().delete_collection(name)
+        except ValueError:
+            pass
+    return RAGSystem()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else rag_system.EMBED_BATCH_SIZE
+    resources = make_resources(n)
+
+    rag = fresh_rag()
+    start = time.perf_counter()
+    for resource in resources:
+        rag.add_resource(resource)
+    per_item = time.perf_counter() - start
+
+    rag = fresh_rag()
+    start = time.perf_counter()
+    rag.add_resources_bulk(resources, batch_size=batch_size)
+    bulk = time.perf_counter() - start
+
+    print(f"resources:  {n}")
+    print(f"per-item:   {per_item:.2f}s ({n / per_item:.0f} resources/s)")
+    print(f"bulk (bs={batch_size}): {bulk:.2f}s ({n / bulk:.0f} resources/s)")
+    print(f"speedup:    {per_item / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
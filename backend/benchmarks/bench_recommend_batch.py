@@ -0,0 +1,85 @@
+"""
+Benchmark: whole-caseload re-ranking, per-case requests vs one batch
+Per-case is what N calls to /api/recommend cost (one encode + one Chroma
+query each); batch is /api/recommend/batch (one batched encode, one
+multi-query Chroma call, one vectorized scoring pass).
+
+Run from backend/:  python benchmarks/bench_recommend_batch.py [sizes...]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+from main import _recommend_batch, _recommend_query, _score_cases
+from rag_system import rag
+
+# Per-case timing is sampled and extrapolated above this many cases
+PER_CASE_SAMPLE = 1000
+
+
+def make_cases(n: int) -> list:
+    rng = random.Random(7)
+    categories = ["housing", "utilities", "medical", "debt", "employment"]
+    return [
+        {
+            "id": f"bench_case_{i}",
+            "employee_name": f"Employee {i}",
+            "employer": f"Employer {i % 50}",
+            "urgency": rng.choice(["critical", "high", "medium"]),
+            "categories": rng.sample(categories, 2),
+            "status": "active",
+            "financial_snapshot": {
+                "annual_income": rng.randrange(20000, 90000, 500),
+                "credit_score": rng.randrange(500, 800),
+                "savings": rng.randrange(0, 5000, 100),
+                "total_debt": rng.randrange(0, 30000, 500),
+                "dependents": rng.randrange(0, 4),
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def per_case(cases: list) -> float:
+    start = time.perf_counter()
+    for case in cases:
+        results = rag.search_resources(_recommend_query(case), n_results=main.RECOMMEND_CANDIDATES)
+        assert results["ids"][0], "resource index is empty"
+        _score_cases([case], [(results["ids"][0], results["distances"][0])])
+    return time.perf_counter() - start
+
+
+def main_bench():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    # Indexing happens in main.warm_up() on startup, not at import
+    stats = rag.sync_resources(main.financial_resources)
+    assert rag.resources_collection.count() == len(main.financial_resources) > 0, stats
+
+    for n in sizes:
+        cases = make_cases(n)
+        rag.embedding_cache.invalidate()
+
+        sample = cases[:PER_CASE_SAMPLE]
+        per_case_total = per_case(sample) * n / len(sample)
+
+        rag.embedding_cache.invalidate()
+        start = time.perf_counter()
+        recommendations = _recommend_batch(cases)
+        batch_total = time.perf_counter() - start
+
+        assert any(recommendations), "batch returned no recommendations"
+
+        note = f" (extrapolated from {len(sample)})" if len(sample) < n else ""
+        print(f"cases: {n}")
+        print(f"  per-case: {per_case_total:.2f}s ({n / per_case_total:.0f} cases/s){note}")
+        print(f"  batch:    {batch_total:.2f}s ({n / batch_total:.0f} cases/s)")
+        print(f"  speedup:  {per_case_total / batch_total:.1f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
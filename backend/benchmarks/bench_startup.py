@@ -0,0 +1,61 @@
+"""
+Benchmark: process startup with an in-memory vs persistent Chroma index
+Each run is a fresh interpreter that imports rag_system and syncs a
+synthetic catalog into the index, as main.warm_up() does on startup.
+Cold = empty CHROMA_PERSIST_DIR, warm = same directory again, so only
+changed resources are re-embedded.
+
+Run from backend/:  python benchmarks/bench_startup.py [n_resources]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import time
+start = time.perf_counter()
+import rag_system
+from benchmarks.bench_rag_ingestion import make_resources
+resources = make_resources({n})
+imported = time.perf_counter()
+stats = rag_system.rag.sync_resources(resources)
+synced = time.perf_counter()
+print(f"{{imported - start:.3f}} {{synced - imported:.3f}} {{stats['embedded']}}")
+"""
+
+
+def run(n: int, persist_dir: str = None) -> tuple:
+    env = dict(os.environ)
+    env.pop("CHROMA_PERSIST_DIR", None)
+    if persist_dir:
+        env["CHROMA_PERSIST_DIR"] = persist_dir
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(n=n)], cwd=BACKEND, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    rag_import, sync, embedded = out.strip().splitlines()[-1].split()
+    return float(rag_import), float(sync), int(embedded)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as persist_dir:
+        runs = [
+            ("in-memory", run(n)),
+            ("persistent cold", run(n, persist_dir)),
+            ("persistent warm", run(n, persist_dir)),
+        ]
+
+    print(f"catalog: {n} synthetic resources")
+    print(f"{'mode':<16} {'rag import':>11} {'index sync':>11} {'embedded':>9}")
+    for label, (rag_import, sync, embedded) in runs:
+        print(f"{label:<16} {rag_import:>10.2f}s {sync:>10.2f}s {embedded:>9}")
+
+
+if __name__ == "__main__":
+    main()
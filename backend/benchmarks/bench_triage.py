@@ -0,0 +1,81 @@
+"""
+Benchmark: triage keyword rules on a 100 KB document context
+Compares the old per-rule `any(word in context ...)` scans with the
+single-pass TriageEngine, and checks both give the same result.
+
+Run from backend/:  python benchmarks/bench_triage.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from triage_rules import TriageEngine, SENTIMENT_KEYWORDS, CATEGORY_RULES, RED_FLAG_RULES
+
+CONTEXT_BYTES = 100 * 1024
+RUNS = 50
+
+FILLER = (
+    "statement period balance account payment due date amount previous "
+    "total charges summary customer number service address page of the and"
+).split()
+
+
+def make_context(size: int, keywords: list) -> str:
+    rng = random.Random(42)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(keywords) if rng.random() < 0.002 else rng.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def legacy_triage(context: str) -> dict:
+    """The original inline rules from main.py - one substring scan per keyword"""
+    context = context.lower()
+    sentiment_score = sum(1 for word in SENTIMENT_KEYWORDS if word in context)
+    categories = [c for c, words in CATEGORY_RULES if any(word in context for word in words)]
+    red_flags = [f for f, words in RED_FLAG_RULES if any(word in context for word in words)]
+    return {
+        "sentiment_score": sentiment_score,
+        "categories": categories or ["general"],
+        "red_flags": red_flags,
+    }
+
+
+def main():
+    engine = TriageEngine()
+    keywords = ["eviction", "landlord", "court", "hospital", "loan", "kids"]
+    context = make_context(CONTEXT_BYTES, keywords)
+    no_hits = make_context(CONTEXT_BYTES, ["zzz"])
+
+    for text in (context, no_hits):
+        hits = engine.scan(text)
+        legacy = legacy_triage(text)
+        assert engine.sentiment(hits)[1] == legacy["sentiment_score"]
+        assert engine.categories(hits) == legacy["categories"]
+        assert engine.red_flags(hits) == legacy["red_flags"]
+
+    print(f"context size: {len(context) / 1024:.0f} KB, {len(engine.matcher.keywords)} keywords")
+    for label, text in (("with hits", context), ("no hits", no_hits)):
+        legacy = timeit.timeit(lambda: legacy_triage(text), number=RUNS) / RUNS
+        single = timeit.timeit(lambda: engine.analyze(text), number=RUNS) / RUNS
+        print(f"{label:>10}: legacy {legacy * 1000:.2f} ms  |  engine {single * 1000:.2f} ms")
+
+    # Legacy cost grows with the number of keywords, the single pass doesn't
+    print("\nscaling with rule size (no-hit context):")
+    for extra in (0, 100, 400):
+        keywords = list(engine.matcher.keywords) + [f"keyword{i}" for i in range(extra)]
+        matcher = TriageEngine(sentiment_keywords=keywords).matcher
+        legacy = timeit.timeit(lambda: [k for k in keywords if k in no_hits], number=RUNS) / RUNS
+        single = timeit.timeit(lambda: matcher.scan(no_hits), number=RUNS) / RUNS
+        print(f"{len(keywords):>5} keywords: legacy {legacy * 1000:.2f} ms  |  engine {single * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
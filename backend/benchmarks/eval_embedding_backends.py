@@ -0,0 +1,99 @@
+"""
+Eval: embedding backends (torch / onnx / onnx-int8) - recall parity and throughput
+Retrieval is done with exact cosine search in NumPy so only the
+embeddings differ. Recall@k is measured against the torch backend's
+top-k on:
+  - seeded resources, queried with the seeded cases' recommend queries
+    plus a few free-text requests
+  - seeded cases, queried the same way (find_similar_cases)
+  - a synthetic catalog of n_synthetic resources (more separation at k)
+
+Run from backend/:  python benchmarks/eval_embedding_backends.py [k] [n_synthetic]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+from main import _recommend_query
+from rag_system import RAGSystem, EMBEDDING_BACKENDS, EMBED_BATCH_SIZE
+from benchmarks.bench_rag_ingestion import make_resources
+
+FREE_TEXT_QUERIES = [
+    "I need help with eviction and rent assistance urgently",
+    "My electricity bill is overdue and getting shut off",
+    "Hospital bills after surgery, can't pay",
+    "Car broke down and I need it to get to work",
+    "Payday loan debt keeps growing",
+]
+THROUGHPUT_TEXTS = 512
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    return np.argsort(-(queries @ corpus.T), axis=1, kind="stable")[:, :k]
+
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray) -> float:
+    k = reference.shape[1]
+    return float(np.mean([len(set(r) & set(c)) / k for r, c in zip(reference, candidate)]))
+
+
+def main_eval():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    n_synthetic = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    cases = main.case_store.all()
+    queries = [_recommend_query(case) for case in cases] + FREE_TEXT_QUERIES
+    corpora = {
+        "seeded resources": [RAGSystem._resource_text(r) for r in main.financial_resources],
+        "seeded cases": [RAGSystem._case_text(c, {}) for c in cases],
+        f"synthetic x{n_synthetic}": [RAGSystem._resource_text(r) for r in make_resources(n_synthetic)],
+    }
+    throughput_texts = (corpora[f"synthetic x{n_synthetic}"] * 2)[:THROUGHPUT_TEXTS]
+
+    reference = reference_name = None
+    rows = []
+    for name, backend_cls in EMBEDDING_BACKENDS.items():
+        try:
+            started = time.perf_counter()
+            backend = backend_cls()
+            load = time.perf_counter() - started
+        except Exception as e:
+            rows.append((name, None, None, None, f"unavailable: {type(e).__name__}: {e}"))
+            continue
+
+        query_vectors = np.asarray(backend.encode(queries, batch_size=EMBED_BATCH_SIZE))
+        rankings = {}
+        for corpus_name, texts in corpora.items():
+            corpus_vectors = np.asarray(backend.encode(texts, batch_size=EMBED_BATCH_SIZE))
+            rankings[corpus_name] = top_k(query_vectors, corpus_vectors, min(k, len(texts)))
+
+        backend.encode(throughput_texts[:EMBED_BATCH_SIZE], batch_size=EMBED_BATCH_SIZE)  # warm
+        started = time.perf_counter()
+        backend.encode(throughput_texts, batch_size=EMBED_BATCH_SIZE)
+        throughput = len(throughput_texts) / (time.perf_counter() - started)
+
+        if reference is None:
+            reference, reference_name = rankings, name
+        recalls = {c: recall_at_k(reference[c], rankings[c]) for c in corpora}
+        rows.append((name, load, throughput, recalls, ""))
+
+    print(f"queries: {len(queries)}, k={k}, throughput on {len(throughput_texts)} texts (batch {EMBED_BATCH_SIZE})")
+    print(f"reference for recall: {reference_name or 'none available'}\n")
+    for name, load, throughput, recalls, note in rows:
+        if recalls is None:
+            print(f"{name:<10} {note}")
+            continue
+        recall_text = "  ".join(f"{c}: {r:.2f}" for c, r in recalls.items())
+        print(f"{name:<10} load {load:5.2f}s  {throughput:7.0f} texts/s  recall@{k}  {recall_text}")
+
+
+if __name__ == "__main__":
+    main_eval()
@@ -0,0 +1,161 @@
+"""
+Case Store - indexed in-memory storage for cases
+Primary lookup by id plus secondary indexes on urgency, category, employer and status
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Iterator, Protocol
+
+# Index name -> case field it is built from
+INDEXED_FIELDS = {
+    "urgency": "urgency",
+    "category": "categories",
+    "employer": "employer",
+    "status": "status",
+}
+
+
+class CaseListener(Protocol):
+    """Receives case changes - an update is reported as remove(old) then add(new)"""
+
+    def on_case_added(self, case: Dict[str, Any]) -> None: ...
+
+    def on_case_removed(self, case: Dict[str, Any]) -> None: ...
+
+
+class CaseStore:
+
+    def __init__(self):
+        self._cases: Dict[str, Dict[str, Any]] = {}
+        # index name -> value -> {case_id: None} (dict keeps insertion order)
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {
+            name: defaultdict(dict) for name in INDEXED_FIELDS
+        }
+        self._listeners: List[CaseListener] = []
+
+    def __len__(self) -> int:
+        return len(self._cases)
+
+    def __contains__(self, case_id: str) -> bool:
+        return case_id in self._cases
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._cases.values()))
+
+    def subscribe(self, listener: CaseListener):
+        """Register a listener for add / update / remove events"""
+        self._listeners.append(listener)
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) lookup by case id"""
+        return self._cases.get(case_id)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All cases in insertion order"""
+        return list(self._cases.values())
+
+    def add(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new case and index it"""
+        if case["id"] in self._cases:
+            raise ValueError(f"Case {case['id']} already exists")
+
+        self._cases[case["id"]] = case
+        self._index(case)
+        for listener in self._listeners:
+            listener.on_case_added(case)
+        return case
+
+    def update(self, case_id: str, **changes) -> Dict[str, Any]:
+        """Update fields on a case, keeping the indexes in sync"""
+        case = self._cases.get(case_id)
+        if case is None:
+            raise KeyError(case_id)
+
+        # Indexed fields must be replaced, not mutated in place, so the
+        # old values can be unindexed here
+        for listener in self._listeners:
+            listener.on_case_removed(case)
+        self._unindex(case)
+        case.update(changes)
+        self._index(case)
+        for listener in self._listeners:
+            listener.on_case_added(case)
+        return case
+
+    def remove(self, case_id: str) -> Optional[Dict[str, Any]]:
+        case = self._cases.pop(case_id, None)
+        if case is not None:
+            self._unindex(case)
+            for listener in self._listeners:
+                listener.on_case_removed(case)
+        return case
+
+    def clear(self):
+        for case in self._cases.values():
+            for listener in self._listeners:
+                listener.on_case_removed(case)
+        self._cases.clear()
+        for index in self._indexes.values():
+            index.clear()
+
+    def find(
+        self,
+        urgency: Optional[str] = None,
+        category: Optional[str] = None,
+        employer: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Cases matching every given filter, using the secondary indexes"""
+        filters = {
+            "urgency": urgency,
+            "category": category,
+            "employer": employer,
+            "status": status,
+        }
+        buckets = [
+            self._indexes[name].get(value, {})
+            for name, value in filters.items()
+            if value is not None
+        ]
+        if not buckets:
+            return self.all()
+
+        # Walk the smallest bucket and check membership in the others
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        return [
+            self._cases[case_id]
+            for case_id in smallest
+            if all(case_id in bucket for bucket in rest)
+        ]
+
+    def count(self, index: str, value: Any) -> int:
+        """Number of cases with the given indexed value - O(1)"""
+        return len(self._indexes[index].get(value, {}))
+
+    def _index_values(self, case: Dict[str, Any], index: str) -> List[Any]:
+        value = case.get(INDEXED_FIELDS[index])
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple, set)):
+            return list(value)
+        return [value]
+
+    def _index(self, case: Dict[str, Any]):
+        for name, index in self._indexes.items():
+            for value in self._index_values(case, name):
+                index[value][case["id"]] = None
+
+    def _unindex(self, case: Dict[str, Any]):
+        for name, index in self._indexes.items():
+            for value in self._index_values(case, name):
+                bucket = index.get(value)
+                if bucket is None:
+                    continue
+                bucket.pop(case["id"], None)
+                if not bucket:
+                    del index[value]
+
+
+# Global instance
+case_store = CaseStore()
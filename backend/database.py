@@ -1,13 +1,55 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, event, exc, Column, Index, Integer, String, Float, DateTime, JSON, Text, Boolean, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
 import os
+import time
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/financial_assistant")
+# postgresql://localhost/financial_assistant in production; SQLite needs no server
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./financial_assistant.db")
+# Connection pool: persistent connections per worker, plus burst overflow
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def create_db_engine(url: str = DATABASE_URL):
+    """Engine with a tuned pool; SQLite gets the settings it needs to be shared across threads"""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+    
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection, otherwise every checkout sees an empty database
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+    
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        # WAL lets several uvicorn workers read while one writes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+    
+    return engine
+
+engine = create_db_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 class Case(Base):
@@ -17,22 +59,29 @@ class Case(Base):
     employee_name = Column(String)
     employer = Column(String)
     urgency = Column(String)
+    # Sort key for urgency (critical = 0), kept in step with urgency by the repository
+    urgency_rank = Column(Integer)
     categories = Column(JSON)
     last_contact = Column(DateTime, default=datetime.utcnow)
     status = Column(String)
     financial_snapshot = Column(JSON)
     open_actions = Column(JSON)
     sentiment = Column(String, nullable=True)
+    notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    messages = relationship("Message", back_populates="case", cascade="all, delete-orphan")
-    documents = relationship("Document", back_populates="case", cascade="all, delete-orphan")
+    messages = relationship("Message", back_populates="case", cascade="all, delete-orphan", order_by="Message.timestamp")
+    documents = relationship("Document", back_populates="case", cascade="all, delete-orphan", order_by="Document.uploaded_at")
+    outcomes = relationship("CaseOutcome", cascade="all, delete-orphan", order_by="CaseOutcome.resolved_at")
+
+# Serves the case listing's keyset order and cursor predicate
+Index("ix_cases_listing_order", Case.urgency_rank, Case.last_contact.desc(), Case.id)
 
 class Message(Base):
     __tablename__ = "messages"
     
     id = Column(String, primary_key=True, index=True)
-    case_id = Column(String, ForeignKey("cases.id"))
+    case_id = Column(String, ForeignKey("cases.id"), index=True)
     sender = Column(String)
     content = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -44,10 +93,14 @@ class Document(Base):
     __tablename__ = "documents"
     
     id = Column(String, primary_key=True, index=True)
-    case_id = Column(String, ForeignKey("cases.id"))
+    case_id = Column(String, ForeignKey("cases.id"), index=True)
     filename = Column(String)
     file_path = Column(String)
     file_type = Column(String)
+    size = Column(Integer, nullable=True)
+    sha256 = Column(String, nullable=True)
+    status = Column(String, default="pending")
+    error = Column(Text, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     extracted_text = Column(Text, nullable=True)
     
@@ -72,7 +125,7 @@ class CaseOutcome(Base):
     __tablename__ = "case_outcomes"
     
     id = Column(Integer, primary_key=True, index=True)
-    case_id = Column(String, ForeignKey("cases.id"))
+    case_id = Column(String, ForeignKey("cases.id"), index=True)
     resolution = Column(String)
     resources_used = Column(JSON)
     success = Column(Boolean)
@@ -80,8 +133,30 @@ class CaseOutcome(Base):
     money_saved = Column(Integer, nullable=True)
     resolved_at = Column(DateTime, default=datetime.utcnow)
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+class ChangeLog(Base):
+    """One row per write to a case, message, note or document; version is the sync cursor"""
+    __tablename__ = "change_log"
+    
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String)  # case / message / note / document
+    entity_id = Column(String)
+    case_id = Column(String, index=True)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+def init_db(bind=None, attempts: int = 5):
+    """Create any missing tables - called on startup, not at import
+    
+    Workers starting together race on CREATE TABLE; the loser retries and
+    create_all's existence check then skips the tables the winner made.
+    """
+    for attempt in range(attempts):
+        try:
+            Base.metadata.create_all(bind=bind or engine)
+            return
+        except (exc.OperationalError, exc.ProgrammingError, exc.IntegrityError):
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
 
 def get_db():
     db = SessionLocal()
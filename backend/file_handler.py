@@ -1,75 +1,296 @@
 import os
-import shutil
+import asyncio
+import functools
+import inspect
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Callable, Dict, Any
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import uuid
+from ocr_cache import ocr_cache
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed to disk in fixed-size chunks
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))  # 25 MB
+# Room for multipart boundaries and part headers on top of the file itself
+UPLOAD_BODY_OVERHEAD = 64 * 1024
+
+# OCR runs in worker processes so it never blocks the event loop
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+PDF_MAX_PAGES = 3  # limit to first 3 pages
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        # Spawned, not forked: by the first upload this process already runs
+        # torch / chromadb / asyncio threads, and forking those can deadlock
+        _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_pool
+
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        await value
+
+def _picklable_errors(func):
+    """Some OCR exceptions can't be unpickled and would break the pool"""
+    @functools.wraps(func)
+    def wrapper(*args):
+        try:
+            return func(*args)
+        except Exception as e:
+            raise RuntimeError(str(e)) from None
+    return wrapper
+
+# Worker functions - module level so they can be pickled into the pool
+@_picklable_errors
+def _ocr_image(image_path: str) -> str:
+    return pytesseract.image_to_string(Image.open(image_path))
+
+@_picklable_errors
+def _pdf_page_count(pdf_path: str) -> int:
+    return pdfinfo_from_path(pdf_path)["Pages"]
+
+@_picklable_errors
+def _ocr_pdf_page(pdf_path: str, page: int) -> str:
+    images = convert_from_path(pdf_path, first_page=page, last_page=page)
+    return "".join(pytesseract.image_to_string(image) + "\n\n" for image in images)
+
+def _read_text_file(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read()
+
+def ocr_settings(file_type: Optional[str]) -> Optional[str]:
+    """Settings that affect OCR output - part of the OCR cache key"""
+    file_type = file_type or ""
+    if "image" in file_type:
+        return "image"
+    if "pdf" in file_type:
+        return f"pdf:max_pages={PDF_MAX_PAGES}"
+    return None
+
+class UploadTooLargeError(ValueError):
+    pass
+
+class UploadLimitMiddleware:
+    """ASGI middleware answering 413 for upload bodies over the limit
+
+    Starlette spools the whole multipart body before the route runs, so
+    the limit has to apply here: a Content-Length over it is rejected
+    before anything is read, and chunked bodies are counted as they
+    arrive and cut off once they cross it.
+    """
+
+    def __init__(self, app, path: str = "/api/upload", max_bytes: int = MAX_UPLOAD_BYTES + UPLOAD_BODY_OVERHEAD):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            await self.reject(send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} byte limit")
+            return message
+
+        async def guarded_send(message):
+            # The app's own error response is replaced by the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self.reject(send)
+
+    async def reject(self, send):
+        body = json.dumps({"detail": f"Upload exceeds {self.max_bytes} byte limit"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
 class FileHandler:
-    @staticmethod
-    async def save_file(file, case_id: str) -> dict:
-        """Save uploaded file and extract text"""
+    def __init__(self):
+        # document id -> running extraction job
+        self._jobs: Dict[str, asyncio.Task] = {}
+
+    async def save_file(
+        self,
+        file,
+        case_id: str,
+        on_extracted: Optional[Callable[[dict], Any]] = None,
+        on_saved: Optional[Callable[[dict], Any]] = None
+    ) -> dict:
+        """Save uploaded file and queue text extraction
+
+        Returns immediately with status "pending"; on_extracted is called
+        (and awaited, if it is async) with the finished result once the OCR
+        job completes. on_saved gets the pending result once the file is on
+        disk, before extraction can finish, so callers can record it first.
+        Files already in the OCR cache come back "completed" with their text.
+        """
         file_id = str(uuid.uuid4())
         file_extension = Path(file.filename).suffix
         filename = f"{file_id}{file_extension}"
         file_path = UPLOAD_DIR / case_id
         file_path.mkdir(exist_ok=True)
-        
+
         full_path = file_path / filename
-        
-        # Save file
-        with open(full_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Extract text based on file type
-        extracted_text = None
-        file_type = file.content_type
-        
-        try:
-            if "image" in file_type:
-                extracted_text = FileHandler.extract_text_from_image(full_path)
-            elif "pdf" in file_type:
-                extracted_text = FileHandler.extract_text_from_pdf(full_path)
-            elif "text" in file_type:
-                with open(full_path, 'r') as f:
-                    extracted_text = f.read()
-        except Exception as e:
-            print(f"Error extracting text: {e}")
-            extracted_text = f"Could not extract text: {str(e)}"
-        
-        return {
+
+        # Stream file to disk, hashing as we go
+        sha256, size = await self.stream_to_disk(file, full_path)
+
+        result = {
             "id": file_id,
             "filename": file.filename,
             "file_path": str(full_path),
-            "file_type": file_type,
-            "extracted_text": extracted_text
+            "file_type": file.content_type,
+            "size": size,
+            "sha256": sha256,
+            "status": "pending",
+            "extracted_text": None
         }
-    
+        if on_saved:
+            await _maybe_await(on_saved(dict(result)))
+
+        settings = ocr_settings(file.content_type)
+        if settings:
+            cached_text = await asyncio.to_thread(ocr_cache.get, sha256, settings)
+            if cached_text is not None:
+                result["status"] = "completed"
+                result["extracted_text"] = cached_text
+                return result
+
+        job = asyncio.create_task(self._run_extraction(dict(result), on_extracted))
+        self._jobs[file_id] = job
+        job.add_done_callback(lambda _: self._jobs.pop(file_id, None))
+
+        return result
+
+    @staticmethod
+    async def stream_to_disk(file, full_path: Path, max_bytes: int = MAX_UPLOAD_BYTES) -> tuple:
+        """Copy an upload to disk chunk by chunk, returning (sha256, size)
+
+        Memory stays at one chunk regardless of file size. By now Starlette
+        has already spooled the request body, which UploadLimitMiddleware
+        caps; this check enforces max_bytes on the file itself.
+        """
+        if file.size is not None and file.size > max_bytes:
+            raise UploadTooLargeError(f"File exceeds {max_bytes} byte limit")
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = await asyncio.to_thread(open, full_path, "wb")
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds {max_bytes} byte limit")
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(buffer.close)
+            full_path.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(buffer.close)
+
+        return digest.hexdigest(), size
+
+    async def _run_extraction(self, result: dict, on_extracted: Optional[Callable[[dict], Any]]):
+        try:
+            result["extracted_text"] = await self.extract_text(Path(result["file_path"]), result["file_type"])
+            result["status"] = "completed"
+
+            settings = ocr_settings(result["file_type"])
+            if settings and result["extracted_text"]:
+                await asyncio.to_thread(ocr_cache.put, result["sha256"], settings, result["extracted_text"])
+        except Exception as e:
+            print(f"Error extracting text: {e}")
+            result["status"] = "failed"
+            result["error"] = f"Could not extract text: {str(e)}"
+
+        if on_extracted:
+            await _maybe_await(on_extracted(result))
+
+    @staticmethod
+    async def extract_text(full_path: Path, file_type: Optional[str]) -> Optional[str]:
+        """Extract text based on file type, off the event loop"""
+        loop = asyncio.get_running_loop()
+        file_type = file_type or ""
+
+        if "image" in file_type:
+            return await loop.run_in_executor(get_ocr_pool(), _ocr_image, str(full_path))
+        if "pdf" in file_type:
+            page_count = await loop.run_in_executor(get_ocr_pool(), _pdf_page_count, str(full_path))
+            pages = range(1, min(page_count, PDF_MAX_PAGES) + 1)
+            # OCR pages in parallel across the pool
+            texts = await asyncio.gather(*[
+                loop.run_in_executor(get_ocr_pool(), _ocr_pdf_page, str(full_path), page)
+                for page in pages
+            ])
+            return "".join(texts)
+        if "text" in file_type:
+            return await asyncio.to_thread(_read_text_file, str(full_path))
+        return None
+
+    def pending_jobs(self) -> int:
+        return len(self._jobs)
+
+    @staticmethod
+    def shutdown():
+        global _ocr_pool
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _ocr_pool = None
+
     @staticmethod
     def extract_text_from_image(image_path: Path) -> str:
         """Extract text from image using OCR"""
         try:
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image)
-            return text
+            return _ocr_image(str(image_path))
         except Exception as e:
             return f"OCR failed: {str(e)}"
-    
+
     @staticmethod
     def extract_text_from_pdf(pdf_path: Path) -> str:
         """Extract text from PDF"""
         try:
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, first_page=1, last_page=3)  # limit to first 3 pages
-            text = ""
-            for image in images:
-                text += pytesseract.image_to_string(image) + "\n\n"
-            return text
+            page_count = _pdf_page_count(str(pdf_path))
+            return "".join(
+                _ocr_pdf_page(str(pdf_path), page)
+                for page in range(1, min(page_count, PDF_MAX_PAGES) + 1)
+            )
         except Exception as e:
             return f"PDF extraction failed: {str(e)}"
 
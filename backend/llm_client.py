@@ -0,0 +1,108 @@
+"""
+LLM Client - shared async Groq client
+One pooled HTTP connection, a concurrency limit and timeouts for every LLM call
+"""
+
+import os
+import asyncio
+from typing import AsyncGenerator, Optional
+import httpx
+from groq import AsyncGroq
+from llm_cache import llm_cache
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+
+
+class LLMClient:
+
+    def __init__(
+        self,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+    ):
+        self.model = model
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[AsyncGroq] = None
+
+    def _get_client(self) -> AsyncGroq:
+        if self._client is None:
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                raise ValueError("GROQ_API_KEY not set")
+
+            # Keep-alive pool shared by every call on this worker
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+            )
+            self._client = AsyncGroq(api_key=api_key, http_client=http_client, timeout=self.timeout)
+        return self._client
+
+    @staticmethod
+    def _request(prompt: str, max_tokens: int, temperature: Optional[float]) -> dict:
+        request = {
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+        }
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 1000,
+        temperature: Optional[float] = None,
+        bypass_cache: bool = False,
+    ) -> str:
+        """Single chat completion, returns the message text
+
+        Identical prompts are served from the shared response cache unless
+        bypass_cache is set.
+        """
+        request = self._request(prompt, max_tokens, temperature)
+
+        async def call() -> str:
+            client = self._get_client()
+            async with self._semaphore:
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(model=self.model, **request),
+                    timeout=self.timeout,
+                )
+            return response.choices[0].message.content.strip()
+
+        key = llm_cache.fingerprint(self.model, prompt, max_tokens=max_tokens, temperature=temperature)
+        return await llm_cache.get_or_call(key, call, bypass=bypass_cache)
+
+    async def stream(self, prompt: str, max_tokens: int = 1000, temperature: Optional[float] = None) -> AsyncGenerator[str, None]:
+        """Streaming chat completion, yields content deltas"""
+        client = self._get_client()
+        async with self._semaphore:
+            stream = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=self.model, stream=True, **self._request(prompt, max_tokens, temperature)
+                ),
+                timeout=self.timeout,
+            )
+            async for chunk in stream:
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Global instance
+llm_client = LLMClient()
@@ -1,17 +1,38 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from datetime import datetime
+import os
 import json
+import time
 import asyncio
-from typing import List, Dict, Any, Optional
-from rag_system import rag, RAGSystem
-from file_handler import file_handler
+import uuid
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from rag_system import rag, RAGSystem, embedder, vector_store, EMBEDDING_BACKEND
+from file_handler import file_handler, UploadTooLargeError, UploadLimitMiddleware
+from ocr_cache import ocr_cache
+from llm_cache import llm_cache
+from triage_rules import triage_engine, document_keywords
+from case_store import case_store
+from analytics import case_aggregates
+from assist_channel import AssistChannel, assist_hub, ASSIST_USE_LLM
+from ai_integration import suggest_response
+from llm_client import llm_client
+from pattern_pipeline import pattern_pipeline
+from resource_matrix import resource_matrix
+from outcome_ingestion import outcome_queue
+from database import init_db
+from repository import case_repository, parse_fields
 from pathlib import Path
 
 app = FastAPI()
 
+# Oversized uploads get a 413 before their body is read (added first so CORS wraps it)
+app.add_middleware(UploadLimitMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,17 +40,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Change-Version"],
 )
 
-# In-memory storage
-cases = []
+# Cases persist in the database; case_store is this process's indexed copy
+case_store.subscribe(case_aggregates)
 financial_resources = []
-case_documents = {}  # case_id -> list of documents
-case_notes = {}  # case_id -> notes string
+# Load the embedder and index resources in the background on startup
+RAG_WARMUP = os.getenv("RAG_WARMUP", "true").lower() == "true"
+RECOMMEND_LIMIT = 5
+RECOMMEND_CANDIDATES = 10  # vector hits scored before eligibility filtering
+RECOMMEND_BATCH_CHUNK = int(os.getenv("RECOMMEND_BATCH_CHUNK", "256"))  # cases per search + rank pass
+CASES_PAGE_SIZE = 50
+CASES_PAGE_MAX = 200  # also caps message pages
+MESSAGES_PAGE_SIZE = 50
+# How often case_store polls the change log for other workers' writes
+CASE_SYNC_SECONDS = float(os.getenv("CASE_SYNC_SECONDS", "1.0"))
 
 # Initialize with sample data
 def init_data():
-    global cases, financial_resources
+    global financial_resources, _case_sync_version
     
     # Sample resources
     financial_resources = [
@@ -107,12 +137,8 @@ def init_data():
         }
     ]
     
-    # Add resources to RAG system
-    for resource in financial_resources:
-        rag.add_resource(resource)
-    
     # Sample cases
-    cases = [
+    sample_cases = [
         {
             "id": "case_1",
             "employee_name": "Maria Rodriguez",
@@ -198,16 +224,116 @@ def init_data():
             ]
         }
     ]
+    
+    # Seed an empty database, then load cases and resources from it
+    init_db()
+    case_repository.seed_if_empty(sample_cases, financial_resources)
+    financial_resources = case_repository.list_resources()
+    # Resources are indexed into the RAG system by warm_up(), off the import path
+    resource_matrix.load(financial_resources)
+    
+    # Version first: writes landing during the load are re-applied by the next sync
+    _case_sync_version = case_repository.current_version()
+    case_store.clear()
+    for case in case_repository.list():
+        case_store.add(case)
+    case_aggregates.total_documents = case_repository.count_documents()
+
+_case_sync_version = 0
+_case_sync_lock: Optional[asyncio.Lock] = None
+_case_sync_task: Optional[asyncio.Task] = None
 
 init_data()
 
+# Background embedder load + resource indexing, started on app startup
+_warmup_task: Optional[asyncio.Task] = None
+_warmup_stats: Dict[str, Any] = {}
+
+async def warm_up():
+    """Load the embedding model and sync the resource and past-case indexes off the event loop"""
+    started = time.perf_counter()
+    await asyncio.to_thread(rag.warm_up)
+    index_stats = await asyncio.to_thread(rag.sync_resources, financial_resources)
+    print(f"Resource index: {index_stats['embedded']} embedded, {index_stats['unchanged']} unchanged, {index_stats['removed']} removed")
+    # past_cases may be in-memory, or missing outcomes recorded by other workers
+    resolved = await asyncio.to_thread(case_repository.resolved_cases)
+    case_stats = await asyncio.to_thread(rag.sync_cases, resolved)
+    print(f"Past-case index: {case_stats['embedded']} embedded, {case_stats['unchanged']} unchanged")
+    _warmup_stats.update(index_stats, past_cases=case_stats, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+
+def _warmup_error() -> Optional[BaseException]:
+    if _warmup_task is None or not _warmup_task.done():
+        return None
+    if _warmup_task.cancelled():
+        return asyncio.CancelledError("warm-up cancelled")
+    return _warmup_task.exception()
+
+async def get_case(case_id: str) -> Optional[Dict[str, Any]]:
+    """Case from case_store, falling back to the database for cases another worker created"""
+    case = case_store.get(case_id)
+    if case is None:
+        case = await asyncio.to_thread(case_repository.get, case_id)
+        if case is not None and case_id not in case_store:
+            case_store.add(case)
+        case = case_store.get(case_id)
+    return case
+
+async def sync_case_store():
+    """Bring case_store and the aggregates up to date with the change log
+    
+    Every worker keeps its own case_store, so writes made by other workers
+    are pulled in here. Re-applying this process's own writes is harmless.
+    """
+    global _case_sync_version, _case_sync_lock
+    if _case_sync_lock is None:
+        _case_sync_lock = asyncio.Lock()
+    async with _case_sync_lock:
+        while True:
+            changes = await asyncio.to_thread(case_repository.changed_cases, _case_sync_version)
+            for case in changes["cases"]:
+                current = case_store.get(case["id"])
+                if current is None:
+                    case_store.add(case)
+                    continue
+                if current.get("documents_text") != case.get("documents_text"):
+                    # Rescan from scratch; this process may have appended in another order
+                    document_keywords.remove_case(case["id"])
+                case_store.update(case["id"], **case)
+            if changes["total_documents"] is not None:
+                case_aggregates.total_documents = changes["total_documents"]
+            _case_sync_version = changes["version"]
+            if not changes["has_more"]:
+                return
+
+async def _poll_case_changes():
+    while True:
+        await asyncio.sleep(CASE_SYNC_SECONDS)
+        try:
+            await sync_case_store()
+        except Exception as e:
+            print(f"Case sync failed: {e}")
+
+def ensure_rag_ready() -> asyncio.Task:
+    """Warm-up task to await before using the RAG index; (re)starts it if needed"""
+    global _warmup_task
+    if _warmup_task is None or _warmup_error() is not None:
+        _warmup_task = asyncio.create_task(warm_up())
+    return _warmup_task
+
 # Request models
 class RecommendRequest(BaseModel):
-    case_id: str
+    case_id: Optional[str] = None
+    case_ids: Optional[List[str]] = None  # batch mode, non-streaming only
+    cosmetic_steps: bool = True  # streaming only: include human-readable progress text
+
+class RecommendBatchRequest(BaseModel):
+    case_ids: Optional[List[str]] = None  # default: every case with this status
+    status: str = "active"
 
 class TriageRequest(BaseModel):
     case_id: str
     message: str
+    cosmetic_steps: bool = True  # streaming only: include human-readable progress text
 
 class ConversationRequest(BaseModel):
     case_id: str
@@ -225,20 +351,88 @@ class CreateCaseRequest(BaseModel):
 class NotesRequest(BaseModel):
     notes: str
 
+class ResolveCaseRequest(BaseModel):
+    resolution: str
+    resources_used: List[str] = []
+    success: bool
+    credit_score_change: Optional[int] = None
+    money_saved: Optional[int] = None
+
+# SSE helpers
+def sse_event(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+def stage_event(stage: str, started: float, message: str, cosmetic_steps: bool, **extra) -> str:
+    """Progress event emitted when a pipeline stage finishes, with its timing"""
+    event = {
+        "stage": stage,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        **extra
+    }
+    if cosmetic_steps:
+        event["token"] = message
+    return sse_event(event)
+
+# Conditional GET helpers
+def list_etag(request: Request, version: int) -> str:
+    """Weak ETag for a list response: change-log version plus path and query"""
+    digest = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode("utf-8")).hexdigest()[:12]
+    return f'W/"{version}-{digest}"'
+
+async def versioned_response(request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+    """Serve build() with an ETag, or an empty 304 if If-None-Match is current
+    
+    The version is read before building, so a write racing the build can
+    only make the ETag older than the body, never newer.
+    """
+    version = await asyncio.to_thread(case_repository.current_version)
+    etag = list_etag(request, version)
+    headers = {"ETag": etag, "X-Change-Version": str(version)}
+    if_none_match = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(await build()), headers=headers)
+
 # API Endpoints
 @app.get("/api/cases")
-async def get_cases():
-    """Get all cases - includes messages for testing"""
-    print(f"DEBUG: Returning {len(cases)} cases")
-    for case in cases:
-        print(f"  - {case['employee_name']}: {len(case.get('messages', []))} messages")
-    return cases
+async def get_cases(http_request: Request, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """All cases, or one keyset page ordered by urgency then last contact
+    
+    Without limit / cursor / fields this returns the full list as before.
+    fields is a comma-separated projection, e.g. id,employee_name,urgency,message_count
+    """
+    async def build():
+        # Read from the database so cases written by other workers are included
+        if limit is None and cursor is None and fields is None:
+            return await asyncio.to_thread(case_repository.list)
+        
+        page_size = max(1, min(limit or CASES_PAGE_SIZE, CASES_PAGE_MAX))
+        try:
+            cases, next_cursor = await asyncio.to_thread(
+                case_repository.page, page_size, cursor, parse_fields(fields)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"cases": cases, "next_cursor": next_cursor}
+    
+    return await versioned_response(http_request, build)
+
+@app.get("/api/cases/changes")
+async def get_case_changes(http_request: Request, since: int = 0):
+    """Cases, messages, notes and documents written after change-log version since
+    
+    Poll with the returned version; an unchanged poll with If-None-Match is a 304.
+    """
+    async def build():
+        return await asyncio.to_thread(case_repository.changes_since, since)
+    
+    return await versioned_response(http_request, build)
 
 @app.post("/api/cases")
 async def create_case(request: CreateCaseRequest):
     """Create a new case"""
     new_case = {
-        "id": f"case_{len(cases) + 1}",
+        "id": f"case_{uuid.uuid4().hex[:12]}",
         "employee_name": request.employee_name,
         "employer": request.employer,
         "urgency": "medium",
@@ -250,14 +444,16 @@ async def create_case(request: CreateCaseRequest):
         "messages": []
     }
     
-    cases.append(new_case)
+    await asyncio.to_thread(case_repository.create, new_case)
+    case_store.add(new_case)
     return {"success": True, "case": new_case}
 
 @app.get("/api/analytics")
 async def get_analytics():
+    await sync_case_store()
     return {
-        "total_active_cases": len(cases),
-        "critical_cases": sum(1 for c in cases if c["urgency"] == "critical"),
+        "total_active_cases": case_aggregates.total_cases,
+        "critical_cases": case_aggregates.urgency_counts.get("critical", 0),
         "this_month": {
             "cases_resolved": 12,
             "total_money_saved": 45000,
@@ -265,55 +461,127 @@ async def get_analytics():
             "avg_response_time_hours": 4.2
         },
         "category_breakdown": {
-            "housing": sum(1 for c in cases if "housing" in c["categories"]),
-            "utilities": sum(1 for c in cases if "utilities" in c["categories"]),
-            "medical": sum(1 for c in cases if "medical" in c["categories"]),
-            "debt": sum(1 for c in cases if "debt" in c["categories"]),
-            "employment": sum(1 for c in cases if "employment" in c["categories"])
+            category: case_aggregates.category_counts.get(category, 0)
+            for category in ["housing", "utilities", "medical", "debt", "employment"]
         }
     }
 
+@app.get("/api/debug/analytics-verify")
+async def debug_analytics_verify():
+    """Check the incremental aggregates against a full rebuild"""
+    await sync_case_store()
+    total_docs = await asyncio.to_thread(case_repository.count_documents)
+    return case_aggregates.verify(case_store.all(), total_docs)
+
+@app.get("/api/case/{case_id}/messages")
+async def get_messages(http_request: Request, case_id: str, limit: int = MESSAGES_PAGE_SIZE, cursor: Optional[str] = None):
+    """A case's messages, newest first, one keyset page at a time"""
+    if not await get_case(case_id):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    async def build():
+        page_size = max(1, min(limit, CASES_PAGE_MAX))
+        try:
+            messages, next_cursor = await asyncio.to_thread(
+                case_repository.messages_page, case_id, page_size, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"messages": messages, "next_cursor": next_cursor}
+    
+    return await versioned_response(http_request, build)
+
 @app.get("/api/case/{case_id}/documents")
-async def get_case_documents(case_id: str):
-    return case_documents.get(case_id, [])
+async def get_case_documents(http_request: Request, case_id: str):
+    async def build():
+        return await asyncio.to_thread(case_repository.documents, case_id)
+    
+    return await versioned_response(http_request, build)
 
 @app.post("/api/case/{case_id}/message")
 async def send_message(case_id: str, request: SendMessageRequest):
     """Add a new message to a case"""
-    case = next((c for c in cases if c["id"] == case_id), None)
+    case = await get_case(case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
     new_message = {
-        "id": f"msg_{len(case['messages']) + 1}",
+        "id": f"msg_{uuid.uuid4().hex[:12]}",
         "sender": request.sender,
         "content": request.content,
         "timestamp": datetime.now().isoformat()
     }
     
+    await asyncio.to_thread(case_repository.add_message, case_id, new_message)
     case["messages"].append(new_message)
-    case["last_contact"] = datetime.now().isoformat()
+    case_store.update(case_id, last_contact=datetime.now().isoformat())
     
     return {"success": True, "message": new_message}
 
 @app.get("/api/case/{case_id}/notes")
 async def get_notes(case_id: str):
     """Get notes for a case"""
-    return {"notes": case_notes.get(case_id, "")}
+    return {"notes": await asyncio.to_thread(case_repository.get_notes, case_id)}
 
 @app.post("/api/case/{case_id}/notes")
 async def save_notes(case_id: str, request: NotesRequest):
     """Save notes for a case"""
-    case = next((c for c in cases if c["id"] == case_id), None)
+    case = await get_case(case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    case_notes[case_id] = request.notes
+    await asyncio.to_thread(case_repository.set_notes, case_id, request.notes)
     return {"success": True}
 
+@app.post("/api/case/{case_id}/resolve")
+async def resolve_case(case_id: str, request: ResolveCaseRequest):
+    """Record a case outcome and queue it for the similar-case index"""
+    if not await get_case(case_id):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    resolved = await asyncio.to_thread(case_repository.record_outcome, case_id, **request.dict())
+    case = case_store.update(case_id, status="resolved", outcome=resolved["outcome"])
+    
+    return {"success": True, "case": case, "indexing": outcome_queue.stats()}
+
+@app.get("/api/case/{case_id}/similar")
+async def similar_cases(case_id: str, n_results: int = 3, urgency: Optional[str] = None, success: Optional[bool] = None):
+    """Resolved cases similar to this one, optionally prefiltered by urgency / success"""
+    case = await get_case(case_id)
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    await ensure_rag_ready()
+    results = await asyncio.to_thread(
+        rag.find_similar_cases, case, n_results, urgency=urgency, success=success
+    )
+    return {
+        "similar_cases": [
+            {"id": rid, "distance": distance, "metadata": metadata}
+            for rid, distance, metadata in zip(results['ids'][0], results['distances'][0], results['metadatas'][0])
+        ]
+    }
+
+@app.get("/api/resources/search")
+async def search_resources(q: str, n_results: int = 5, category: Optional[str] = None, location: Optional[str] = None):
+    """Hybrid BM25 + vector resource search, prefiltered by category / location"""
+    await ensure_rag_ready()
+    results = await asyncio.to_thread(
+        rag.hybrid_search, q, n_results, category=category, location=location
+    )
+    return {
+        "resources": [
+            {"id": rid, "score": score, "distance": distance, "metadata": metadata}
+            for rid, score, distance, metadata in zip(
+                results['ids'][0], results['scores'][0], results['distances'][0], results['metadatas'][0]
+            )
+        ]
+    }
+
 @app.get("/api/debug/vector-search")
 async def debug_vector_search():
     """Debug endpoint to show vector search is real"""
+    await ensure_rag_ready()
     
     # Test query 1: Housing/eviction
     query1 = "I need help with eviction and rent assistance urgently"
@@ -338,29 +606,27 @@ async def debug_vector_search():
         "explanation": "Lower distance = better match. Different queries get different results. This is REAL semantic search, not hardcoded!"
     }
 
-@app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...), case_id: str = None):
-    if not case_id:
-        raise HTTPException(status_code=400, detail="case_id required")
-    
-    # Save file and extract text
-    result = await file_handler.save_file(file, case_id)
-    
-    # Store document metadata
-    if case_id not in case_documents:
-        case_documents[case_id] = []
-    
-    doc_metadata = {
-        "id": result["id"],
-        "filename": result["filename"],
-        "file_type": result["file_type"],
-        "uploaded_at": datetime.now().isoformat(),
-        "has_text": bool(result["extracted_text"] and len(result["extracted_text"]) > 10)
+@app.get("/api/debug/cache-stats")
+async def debug_cache_stats():
+    """Hit / miss counters for the in-process caches"""
+    return {
+        "embedding_cache": rag.embedding_cache.stats(),
+        "ocr_cache": ocr_cache.stats(),
+        "llm_cache": llm_cache.stats()
     }
-    case_documents[case_id].append(doc_metadata)
+
+async def _on_document_extracted(case_id: str, result: Dict[str, Any]):
+    """Called when a background OCR job finishes"""
+    await asyncio.to_thread(
+        case_repository.update_document,
+        result["id"],
+        status=result["status"],
+        extracted_text=result["extracted_text"],
+        error=result.get("error")
+    )
     
     # Add extracted text to case context for AI to use
-    case = next((c for c in cases if c["id"] == case_id), None)
+    case = await get_case(case_id)
     if case and result["extracted_text"]:
         if "documents_text" not in case:
             case["documents_text"] = []
@@ -368,21 +634,42 @@ async def upload_file(file: UploadFile = File(...), case_id: str = None):
             "filename": result["filename"],
             "text": result["extracted_text"]
         })
+        # Scan the new document once so triage doesn't re-read it
+        document_keywords.refresh(case)
+
+@app.post("/api/upload")
+async def upload_file(file: UploadFile = File(...), case_id: str = None):
+    if not case_id:
+        raise HTTPException(status_code=400, detail="case_id required")
+    if not await get_case(case_id):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    # Save file and queue text extraction
+    try:
+        result = await file_handler.save_file(
+            file, case_id,
+            on_extracted=lambda extracted: _on_document_extracted(case_id, extracted),
+            # Record the document before its extraction can complete
+            on_saved=lambda saved: asyncio.to_thread(case_repository.add_document, case_id, saved)
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    case_aggregates.on_document_added()
+    
+    # OCR cache hit - text is already available
+    if result["status"] == "completed":
+        await _on_document_extracted(case_id, result)
     
     return {
         "success": True,
         "document_id": result["id"],
+        "status": result["status"],
         "extracted_text_preview": result["extracted_text"][:200] if result["extracted_text"] else None
     }
 
-@app.post("/api/recommend")
-async def recommend_resources(request: RecommendRequest):
-    """Non-streaming recommendations"""
-    case = next((c for c in cases if c["id"] == request.case_id), None)
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Build context including documents
+def _recommend_query(case: Dict[str, Any]) -> str:
+    """Vector search query for a case, including document context"""
     query_parts = [
         f"Financial Profile:",
         f"- Income: ${case['financial_snapshot']['annual_income']}",
@@ -399,70 +686,109 @@ async def recommend_resources(request: RecommendRequest):
         for doc in case["documents_text"]:
             query_parts.append(f"- {doc['filename']}: {doc['text'][:300]}")
     
-    query = "\n".join(query_parts)
-    
-    # Search RAG system
-    results = rag.search_resources(query, n_results=5)
-    
-    # Build recommendations
+    return "\n".join(query_parts)
+
+def _recommendation(scored: Dict[str, Any], reasoning: str) -> Dict[str, Any]:
+    resource = resource_matrix.resources[scored['row']]
+    return {
+        'resource_id': resource['id'],
+        'name': resource['name'],
+        'description': resource['description'],
+        'max_amount': resource.get('max_amount'),
+        'typical_approval_time': resource['typical_approval_time'],
+        'application_difficulty': resource['application_difficulty'],
+        'success_rate': resource['success_rate'],
+        'relevance_score': scored['relevance_score'],
+        'estimated_success': scored['estimated_success'],
+        'category_match': scored['category_match'],
+        'reasoning': reasoning
+    }
+
+def _score_cases(cases: List[Dict[str, Any]], retrieved: List[Tuple[List[str], List[float]]]) -> List[List[Dict[str, Any]]]:
+    """Vectorized eligibility filtering and scoring, one list per case"""
     recommendations = []
-    for i in range(len(results['ids'][0])):
-        doc_id = results['ids'][0][i]
-        metadata = results['metadatas'][0][i]
-        distance = results['distances'][0][i]
-        
-        resource = next((r for r in financial_resources if r['id'] == doc_id), None)
-        if not resource:
-            continue
-        
-        relevance_score = max(0, 1 - (distance / 2))
-        credit_factor = case['financial_snapshot']['credit_score'] / 850
-        estimated_success = (resource['success_rate'] * 0.7) + (credit_factor * 0.3)
-        
-        reasoning = f"Matches your {', '.join(case['categories'])} situation. "
-        if case['urgency'] in ['critical', 'high']:
-            reasoning += f"Fast approval time ({resource['typical_approval_time']}) suits urgent need. "
-        
-        recommendations.append({
-            'resource_id': resource['id'],
-            'name': resource['name'],
-            'description': resource['description'],
-            'max_amount': resource.get('max_amount'),
-            'typical_approval_time': resource['typical_approval_time'],
-            'application_difficulty': resource['application_difficulty'],
-            'success_rate': resource['success_rate'],
-            'relevance_score': relevance_score,
-            'estimated_success': estimated_success,
-            'reasoning': reasoning
-        })
+    for case, ranked in zip(cases, resource_matrix.rank(cases, retrieved, limit=RECOMMEND_LIMIT)):
+        items = []
+        for scored in ranked:
+            resource = resource_matrix.resources[scored['row']]
+            reasoning = f"Matches your {', '.join(case['categories'])} situation. "
+            if case['urgency'] in ['critical', 'high']:
+                reasoning += f"Fast approval time ({resource['typical_approval_time']}) suits urgent need. "
+            items.append(_recommendation(scored, reasoning))
+        recommendations.append(items)
+    return recommendations
+
+def _recommend_batch(cases: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Batched embedding, multi-query vector search and scoring, RECOMMEND_BATCH_CHUNK cases at a time
     
+    Chunking keeps memory bounded by the chunk size rather than the caseload.
+    """
+    recommendations = []
+    for start in range(0, len(cases), RECOMMEND_BATCH_CHUNK):
+        chunk = cases[start:start + RECOMMEND_BATCH_CHUNK]
+        results = rag.search_resources_batch([_recommend_query(case) for case in chunk], n_results=RECOMMEND_CANDIDATES)
+        recommendations.extend(_score_cases(chunk, list(zip(results['ids'], results['distances']))))
     return recommendations
 
+@app.post("/api/recommend")
+async def recommend_resources(request: RecommendRequest):
+    """Non-streaming recommendations
+    
+    Pass case_ids instead of case_id to score many cases in one call;
+    the response is then {"results": {case_id: recommendations}}.
+    """
+    case_ids = request.case_ids or ([request.case_id] if request.case_id else [])
+    cases = [await get_case(case_id) for case_id in case_ids]
+    if not cases or not all(cases):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    # Search RAG system and build recommendations
+    await ensure_rag_ready()
+    recommendations = await asyncio.to_thread(_recommend_batch, cases)
+    
+    if request.case_ids:
+        return {"results": dict(zip(case_ids, recommendations))}
+    return recommendations[0]
+
+@app.post("/api/recommend/batch")
+async def recommend_resources_batch(request: RecommendBatchRequest):
+    """Re-rank recommendations for many cases at once
+    
+    Without case_ids, every case with the given status (default active)
+    is re-ranked - e.g. after the resource catalog changes.
+    """
+    if request.case_ids is None:
+        await sync_case_store()
+        cases = case_store.find(status=request.status)
+        missing = []
+    else:
+        cases = [await get_case(case_id) for case_id in request.case_ids]
+        missing = [case_id for case_id, case in zip(request.case_ids, cases) if not case]
+        cases = [case for case in cases if case]
+    
+    await ensure_rag_ready()
+    started = time.perf_counter()
+    recommendations = await asyncio.to_thread(_recommend_batch, cases) if cases else []
+    
+    return {
+        "results": {case["id"]: recs for case, recs in zip(cases, recommendations)},
+        "missing": missing,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
 @app.post("/api/recommend/stream")
 async def recommend_resources_stream(request: RecommendRequest):
     """Streaming recommendations with thinking process"""
     
     async def event_generator():
         try:
-            case = next((c for c in cases if c['id'] == request.case_id), None)
+            case = await get_case(request.case_id)
             if not case:
-                yield f"data: {json.dumps({'error': 'Case not found'})}\n\n"
+                yield sse_event({'error': 'Case not found'})
                 return
             
-            # Stream thinking steps
-            steps = [
-                "🔍 Analyzing financial profile...",
-                "📊 Checking credit score and income...",
-                "🔎 Searching vector database for relevant resources...",
-                "📄 Reviewing uploaded documents..."
-            ]
-            
-            for step in steps:
-                newline = '\n'
-                yield f"data: {json.dumps({'token': step + newline})}\n\n"
-                await asyncio.sleep(0.4)
-            
-            # Build query with document context
+            # Stage 1: document context assembly
+            started = time.perf_counter()
             query_parts = [
                 f"Income: ${case['financial_snapshot']['annual_income']}",
                 f"Credit: {case['financial_snapshot']['credit_score']}",
@@ -470,41 +796,40 @@ async def recommend_resources_stream(request: RecommendRequest):
                 f"Urgency: {case['urgency']}"
             ]
             
-            # Add document insights
-            if "documents_text" in case and case["documents_text"]:
-                doc_count_msg = f'📋 Found {len(case["documents_text"])} uploaded documents\n'
-                yield f"data: {json.dumps({'token': doc_count_msg})}\n\n"
-                await asyncio.sleep(0.3)
-                for doc in case["documents_text"]:
-                    query_parts.append(f"Document: {doc['text'][:300]}")
+            doc_count = len(case.get("documents_text") or [])
+            for doc in case.get("documents_text") or []:
+                query_parts.append(f"Document: {doc['text'][:300]}")
             
             query = "\n".join(query_parts)
+            yield stage_event(
+                "context", started,
+                f'📋 Analyzed financial profile and {doc_count} uploaded documents\n',
+                request.cosmetic_steps, documents=doc_count
+            )
             
-            ai_msg = '✨ Querying AI knowledge base...\n'
-            yield f"data: {json.dumps({'token': ai_msg})}\n\n"
-            await asyncio.sleep(0.3)
-            
-            # RAG search
-            results = rag.search_resources(query, n_results=5)
+            # Stage 2: embedding
+            await ensure_rag_ready()
+            started = time.perf_counter()
+            query_embedding = await asyncio.to_thread(rag.embed_text, query)
+            yield stage_event("embedding", started, '🧠 Encoded case profile\n', request.cosmetic_steps)
             
-            found_msg = f'✅ Found {len(results["ids"][0])} relevant resources\n'
-            yield f"data: {json.dumps({'token': found_msg})}\n\n"
-            await asyncio.sleep(0.3)
+            # Stage 3: vector search
+            started = time.perf_counter()
+            results = await asyncio.to_thread(rag.search_resources_by_embedding, query_embedding, RECOMMEND_CANDIDATES)
+            yield stage_event(
+                "vector_search", started,
+                f'✅ Found {len(results["ids"][0])} relevant resources\n',
+                request.cosmetic_steps, matches=len(results["ids"][0])
+            )
             
-            # Build recommendations
+            # Stage 4: scoring
+            started = time.perf_counter()
             recommendations = []
-            for i in range(len(results['ids'][0])):
-                doc_id = results['ids'][0][i]
-                distance = results['distances'][0][i]
-                
-                resource = next((r for r in financial_resources if r['id'] == doc_id), None)
-                if not resource:
-                    continue
-                
-                relevance_score = max(0, 1 - (distance / 2))
-                credit_factor = case['financial_snapshot']['credit_score'] / 850
-                estimated_success = (resource['success_rate'] * 0.7) + (credit_factor * 0.3)
-                
+            ranked = resource_matrix.rank(
+                [case], [(results['ids'][0], results['distances'][0])], limit=RECOMMEND_LIMIT
+            )[0]
+            for scored in ranked:
+                resource = resource_matrix.resources[scored['row']]
                 reasoning = f"Matches your {', '.join(case['categories'])} situation. "
                 if case['urgency'] in ['critical', 'high']:
                     reasoning += f"Fast approval ({resource['typical_approval_time']}). "
@@ -513,30 +838,16 @@ async def recommend_resources_stream(request: RecommendRequest):
                 else:
                     reasoning += "May need additional documentation."
                 
-                recommendations.append({
-                    'resource_id': resource['id'],
-                    'name': resource['name'],
-                    'description': resource['description'],
-                    'max_amount': resource.get('max_amount'),
-                    'typical_approval_time': resource['typical_approval_time'],
-                    'application_difficulty': resource['application_difficulty'],
-                    'success_rate': resource['success_rate'],
-                    'relevance_score': relevance_score,
-                    'estimated_success': estimated_success,
-                    'reasoning': reasoning
-                })
+                recommendations.append(_recommendation(scored, reasoning))
+            yield stage_event("scoring", started, '🎯 Ranked by relevance\n', request.cosmetic_steps)
             
-            rank_msg = '🎯 Ranking by relevance...\n'
-            yield f"data: {json.dumps({'token': rank_msg})}\n\n"
-            await asyncio.sleep(0.2)
+            if request.cosmetic_steps:
+                yield sse_event({'token': '✅ Complete!\n\n'})
             
-            complete_msg = '✅ Complete!\n\n'
-            yield f"data: {json.dumps({'token': complete_msg})}\n\n"
-            
-            yield f"data: {json.dumps({'done': True, 'result': recommendations})}\n\n"
+            yield sse_event({'done': True, 'result': recommendations})
             
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e)})
     
     return StreamingResponse(
         event_generator(),
@@ -550,82 +861,14 @@ async def recommend_resources_stream(request: RecommendRequest):
 @app.post("/api/triage")
 async def triage_message(request: TriageRequest):
     """Non-streaming triage"""
-    case = next((c for c in cases if c["id"] == request.case_id), None)
+    await sync_case_store()  # document hits come from other workers' uploads too
+    case = await get_case(request.case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    # Analyze message with document context
-    context = request.message.lower()
-    
-    # Add document context
-    if "documents_text" in case and case["documents_text"]:
-        for doc in case["documents_text"]:
-            context += " " + doc["text"].lower()
-    
-    # Sentiment
-    negative_words = ['eviction', 'desperate', 'urgent', 'help', 'crisis', 'emergency', 'cant', "can't", 'unable', 'shutoff', 'disconnect']
-    sentiment_score = sum(1 for word in negative_words if word in context)
-    
-    if sentiment_score >= 3:
-        sentiment = "highly distressed"
-        priority_score = 9
-    elif sentiment_score >= 2:
-        sentiment = "concerned"
-        priority_score = 7
-    else:
-        sentiment = "neutral"
-        priority_score = 5
-    
-    # Categories
-    categories = []
-    if any(word in context for word in ['eviction', 'rent', 'landlord', 'lease']):
-        categories.append('housing')
-    if any(word in context for word in ['bill', 'utility', 'electric', 'water', 'gas']):
-        categories.append('utilities')
-    if any(word in context for word in ['medical', 'hospital', 'doctor', 'health']):
-        categories.append('medical')
-    if any(word in context for word in ['job', 'work', 'unemployed', 'laid off']):
-        categories.append('employment')
-    if any(word in context for word in ['debt', 'credit', 'loan']):
-        categories.append('debt')
-    
-    if not categories:
-        categories = ['general']
-    
-    # Red flags
-    red_flags = []
-    if 'eviction' in context:
-        red_flags.append("⚠️ Eviction notice - immediate action required")
-    if 'court' in context:
-        red_flags.append("⚠️ Legal proceedings - may need legal aid")
-    if any(word in context for word in ['disconnect', 'shutoff', 'shut off']):
-        red_flags.append("⚠️ Utility disconnection threat")
-    if any(word in context for word in ['children', 'kids', 'dependents']):
-        red_flags.append("👨‍👩‍👧‍👦 Dependents involved - prioritize family stability")
-    
-    # Urgency
-    if red_flags or sentiment_score >= 3:
-        urgency = "critical"
-    elif sentiment_score >= 2:
-        urgency = "high"
-    else:
-        urgency = "medium"
-    
-    # Response suggestion
-    if urgency == "critical":
-        suggested_response = f"I understand this is urgent. Let me help you right away. I'm looking into emergency programs for {categories[0]}. Can you tell me the specific deadline?"
-    else:
-        suggested_response = f"Thank you for reaching out. I can help with {', '.join(categories)}. Let's find the best solution together."
-    
-    return {
-        'urgency': urgency,
-        'priority_score': priority_score,
-        'sentiment': sentiment,
-        'categories': categories,
-        'red_flags': red_flags,
-        'suggested_response': suggested_response,
-        'reasoning': f"Detected {sentiment} tone with {len(red_flags)} urgent indicators. Categories: {', '.join(categories)}."
-    }
+    # Analyze message; document keywords were precomputed at upload
+    hits = triage_engine.scan(request.message) | document_keywords.hits(case)
+    return triage_engine.analyze_hits(hits)
 
 @app.post("/api/triage/stream")
 async def triage_message_stream(request: TriageRequest):
@@ -633,89 +876,54 @@ async def triage_message_stream(request: TriageRequest):
     
     async def event_generator():
         try:
-            case = next((c for c in cases if c['id'] == request.case_id), None)
+            await sync_case_store()
+            case = await get_case(request.case_id)
             if not case:
-                yield f"data: {json.dumps({'error': 'Case not found'})}\n\n"
+                yield sse_event({'error': 'Case not found'})
                 return
             
-            steps = [
-                "📖 Reading message...",
-                "📄 Checking uploaded documents...",
-                "😊 Analyzing sentiment...",
-                "🚨 Identifying urgency indicators...",
-                "🏷️ Categorizing issues...",
-                "💡 Generating response..."
-            ]
-            
-            for step in steps:
-                newline = '\n'
-                yield f"data: {json.dumps({'token': step + newline})}\n\n"
-                await asyncio.sleep(0.3)
-            
-            # Build context
-            context = request.message.lower()
-            if "documents_text" in case and case["documents_text"]:
-                doc_count = len(case["documents_text"])
-                doc_msg = f'📋 Found {doc_count} documents with additional context\n'
-                yield f"data: {json.dumps({'token': doc_msg})}\n\n"
-                await asyncio.sleep(0.2)
-                for doc in case["documents_text"]:
-                    context += " " + doc["text"].lower()
-            
-            # Analysis
-            negative_words = ['eviction', 'desperate', 'urgent', 'help', 'crisis', 'emergency', 'cant', "can't", 'unable']
-            sentiment_score = sum(1 for word in negative_words if word in context)
+            # Stage 1: precomputed document keywords
+            started = time.perf_counter()
+            doc_count = len(case.get("documents_text") or [])
+            document_hits = document_keywords.hits(case)
+            yield stage_event(
+                "context", started,
+                f'📄 Checked {doc_count} documents\n',
+                request.cosmetic_steps, documents=doc_count
+            )
             
-            if sentiment_score >= 3:
-                sentiment = "highly distressed"
-                priority_score = 9
-            elif sentiment_score >= 2:
-                sentiment = "concerned"
-                priority_score = 7
-            else:
-                sentiment = "neutral"
-                priority_score = 5
+            # Stage 2: keyword scan of the new message
+            started = time.perf_counter()
+            hits = triage_engine.scan(request.message) | document_hits
+            yield stage_event("keyword_scan", started, f'🔎 Matched {len(hits)} keywords\n', request.cosmetic_steps)
             
-            categories = []
-            if any(word in context for word in ['eviction', 'rent', 'landlord']):
-                categories.append('housing')
-            if any(word in context for word in ['bill', 'utility', 'electric']):
-                categories.append('utilities')
-            if any(word in context for word in ['medical', 'hospital']):
-                categories.append('medical')
+            # Stage 3: sentiment
+            started = time.perf_counter()
+            sentiment, sentiment_score, priority_score = triage_engine.sentiment(hits)
+            yield stage_event("sentiment", started, f'😊 Sentiment: {sentiment}\n', request.cosmetic_steps)
             
-            if not categories:
-                categories = ['general']
+            # Stage 4: categories
+            started = time.perf_counter()
+            categories = triage_engine.categories(hits)
+            yield stage_event("categories", started, f'🏷️ Categories: {", ".join(categories)}\n', request.cosmetic_steps)
             
-            red_flags = []
-            if 'eviction' in context:
-                red_flags.append("Eviction notice detected")
-            if 'shutoff' in context or 'disconnect' in context:
-                red_flags.append("Utility disconnection threat")
+            # Stage 5: urgency indicators
+            started = time.perf_counter()
+            red_flags = triage_engine.red_flags(hits)
+            urgency = triage_engine.urgency(red_flags, sentiment_score)
+            yield stage_event("urgency", started, f'🚨 Urgency: {urgency}\n', request.cosmetic_steps)
             
-            urgency = "critical" if red_flags else ("high" if sentiment_score >= 2 else "medium")
+            # Stage 6: response
+            started = time.perf_counter()
+            result = triage_engine.build_result(urgency, priority_score, sentiment, categories, red_flags)
+            yield stage_event("response", started, '💡 Generated response\n', request.cosmetic_steps)
             
-            if urgency == "critical":
-                suggested_response = f"This is urgent. I'll help immediately with {categories[0]} assistance. What's your deadline?"
-            else:
-                suggested_response = f"I can help with {', '.join(categories)}. Let's work on this together."
-            
-            result = {
-                'urgency': urgency,
-                'priority_score': priority_score,
-                'sentiment': sentiment,
-                'categories': categories,
-                'red_flags': red_flags,
-                'suggested_response': suggested_response,
-                'reasoning': f"{sentiment} sentiment, {len(red_flags)} urgent flags"
-            }
-            
-            complete_msg = '✅ Analysis complete!\n\n'
-            yield f"data: {json.dumps({'token': complete_msg})}\n\n"
-            yield f"data: {json.dumps({'done': True, 'result': result})}\n\n"
+            if request.cosmetic_steps:
+                yield sse_event({'token': '✅ Analysis complete!\n\n'})
+            yield sse_event({'done': True, 'result': result})
             
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e)})
     
     return StreamingResponse(
         event_generator(),
@@ -726,25 +934,16 @@ async def triage_message_stream(request: TriageRequest):
         }
     )
 
-@app.post("/api/conversation/assist")
-async def conversation_assist(request: ConversationRequest):
-    """Get AI suggestions for responding to a message"""
-    case = next((c for c in cases if c["id"] == request.case_id), None)
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Simple response suggestions based on message content
-    message_lower = request.message.lower()
+def _assist_suggestions(case: Dict[str, Any], message: str) -> List[str]:
+    """Rule-based writing suggestions for a draft reply"""
+    message_lower = message.lower()
     suggestions = []
     
-    if not request.message.strip():
-        return {"suggestions": ["Please type a message to get AI suggestions"]}
-    
     # Tone suggestions
     if any(word in message_lower for word in ['unfortunately', 'sorry', 'cannot']):
         suggestions.append("💡 Consider a more empowering tone: Focus on what you CAN do rather than limitations")
     
-    if len(request.message) < 20:
+    if len(message) < 20:
         suggestions.append("✏️ Add more detail: Explain specific next steps or resources")
     
     # Resource suggestions based on case
@@ -757,24 +956,87 @@ async def conversation_assist(request: ConversationRequest):
     if not suggestions:
         suggestions.append("✅ Message looks good! Clear and helpful.")
     
-    return {"suggestions": suggestions}
+    return suggestions
+
+def _assist_compute(case_id: str):
+    """Assist computation for one case, run by its AssistChannel"""
+    async def compute(message: str) -> Dict[str, Any]:
+        case = await get_case(case_id)
+        if not case:
+            return {"suggestions": []}
+        if not message.strip():
+            return {"suggestions": ["Please type a message to get AI suggestions"]}
+        
+        result = {"suggestions": _assist_suggestions(case, message)}
+        if ASSIST_USE_LLM:
+            result["ai"] = await suggest_response(case, message)
+        return result
+    return compute
+
+@app.post("/api/conversation/assist")
+async def conversation_assist(request: ConversationRequest):
+    """Get AI suggestions for responding to a message
+    
+    A newer draft for the same case supersedes this one, which then
+    returns superseded=true instead of a result.
+    """
+    if not await get_case(request.case_id):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    channel = assist_hub.channel(request.case_id, _assist_compute(request.case_id))
+    result = await channel.submit(request.message, debounce=False)
+    if result is None:
+        return {"suggestions": [], "superseded": True}
+    return result
+
+@app.websocket("/ws/conversation/assist/{case_id}")
+async def conversation_assist_ws(websocket: WebSocket, case_id: str):
+    """Assist channel for one typist: send {"seq", "message"} per draft
+    
+    Drafts are debounced server-side and a newer draft cancels the work
+    for older ones, so only the latest draft gets a {"seq", ...} reply.
+    """
+    await websocket.accept()
+    if not await get_case(case_id):
+        await websocket.close(code=4404, reason="Case not found")
+        return
+    
+    channel = AssistChannel(_assist_compute(case_id))
+    
+    async def reply(seq: Any, message: str):
+        result = await channel.submit(message)
+        if result is not None:
+            await websocket.send_json({"seq": seq, **result})
+    
+    pending = set()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            task = asyncio.create_task(reply(data.get("seq"), data.get("message", "")))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        channel.cancel()
+        for task in pending:
+            task.cancel()
 
 @app.get("/api/insights/patterns")
 async def get_pattern_insights():
     """Analyze patterns across all cases"""
+    await sync_case_store()
     
-    # Calculate real insights
-    total_cases = len(cases)
-    urgent_cases = sum(1 for c in cases if c["urgency"] in ["critical", "high"])
-    avg_debt = sum(c["financial_snapshot"]["total_debt"] for c in cases) / total_cases if total_cases > 0 else 0
-    avg_income = sum(c["financial_snapshot"]["annual_income"] for c in cases) / total_cases if total_cases > 0 else 0
-    avg_credit = sum(c["financial_snapshot"]["credit_score"] for c in cases) / total_cases if total_cases > 0 else 0
+    # Read the running aggregates
+    total_cases = case_aggregates.total_cases
+    urgent_cases = case_aggregates.urgent_cases()
+    averages = case_aggregates.averages()
+    avg_debt = averages["debt"]
+    avg_income = averages["income"]
+    avg_credit = averages["credit"]
     
     # Category trends
-    category_counts = {}
-    for case in cases:
-        for cat in case["categories"]:
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+    category_counts = case_aggregates.category_counts
     
     top_category = max(category_counts.items(), key=lambda x: x[1])[0] if category_counts else "housing"
     
@@ -786,12 +1048,65 @@ async def get_pattern_insights():
     ]
     
     # Document insights
-    total_docs = sum(len(docs) for docs in case_documents.values())
+    total_docs = case_aggregates.total_documents
     if total_docs > 0:
         insights.append(f"📄 {total_docs} documents uploaded across cases - AI has more context!")
     
     return {"insights": insights}
 
+@app.get("/api/insights/patterns/stream")
+async def get_pattern_insights_stream(bypass_cache: bool = False):
+    """Map-reduce pattern detection over every case, with progress events"""
+    
+    async def event_generator():
+        try:
+            await sync_case_store()
+            async for event in pattern_pipeline.run(case_store.all(), bypass_cache=bypass_cache):
+                yield sse_event(event)
+        except Exception as e:
+            yield sse_event({'error': str(e)})
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.on_event("startup")
+async def startup():
+    global _case_sync_task, _case_sync_lock
+    outcome_queue.start()
+    _case_sync_lock = asyncio.Lock()
+    _case_sync_task = asyncio.create_task(_poll_case_changes())
+    if RAG_WARMUP:
+        ensure_rag_ready()
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: 200 once the embedder is loaded and resources are indexed"""
+    error = _warmup_error()
+    index_ready = _warmup_task is not None and _warmup_task.done() and error is None
+    body = {
+        "ready": index_ready,
+        "embedder": dict(embedder.status(), backend=EMBEDDING_BACKEND),
+        "vector_store": vector_store.status(),
+        "index": _warmup_stats if index_ready else None
+    }
+    if error is not None:
+        body["error"] = str(error)
+    return JSONResponse(status_code=200 if index_ready else 503, content=body)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _case_sync_task is not None:
+        _case_sync_task.cancel()
+    await outcome_queue.stop()
+    file_handler.shutdown()
+    await llm_client.aclose()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+OCR Cache - content-addressed store of extracted text
+Keyed by file hash plus OCR settings, backed by SQLite with size-based LRU eviction
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", "uploads/ocr_cache.sqlite3")
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))  # 100 MB
+
+
+class OCRCache:
+
+    def __init__(self, path: str = OCR_CACHE_PATH, max_bytes: int = OCR_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    @staticmethod
+    def key(sha256: str, settings: str) -> str:
+        return f"{sha256}:{settings}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_last_access ON ocr_results (last_access)")
+            self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        return self._conn
+
+    def get(self, sha256: str, settings: str) -> Optional[str]:
+        key = self.key(sha256, settings)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT text FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, sha256: str, settings: str, text: str):
+        key = self.key(sha256, settings)
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            existing = conn.execute("SELECT size FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if existing:
+                self._total_bytes -= existing[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time())
+            )
+            self._total_bytes += size
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until under max_bytes"""
+        while self._total_bytes > self.max_bytes:
+            row = conn.execute(
+                "SELECT key, size FROM ocr_results ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            conn.execute("DELETE FROM ocr_results WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM ocr_results")
+            conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+# Global instance
+ocr_cache = OCRCache()
@@ -0,0 +1,118 @@
+"""
+Outcome Ingestion - background queue feeding resolved cases into the past_cases index
+Outcomes are batched so each flush is one encode and one upsert per chunk
+"""
+
+import os
+import asyncio
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+from rag_system import rag
+
+OUTCOME_BATCH_SIZE = int(os.getenv("OUTCOME_BATCH_SIZE", "32"))
+# How long the worker waits for more outcomes before flushing a partial batch
+OUTCOME_FLUSH_SECONDS = float(os.getenv("OUTCOME_FLUSH_SECONDS", "1.0"))
+
+
+class OutcomeIngestionQueue:
+    """Collects (case, outcome) pairs from any thread and indexes them in batches
+
+    submit() never blocks on embedding. Once start() has been called on
+    the event loop, a worker flushes whenever a full batch is waiting or
+    OUTCOME_FLUSH_SECONDS after the first pending outcome.
+    """
+
+    def __init__(self, batch_size: int = OUTCOME_BATCH_SIZE, flush_seconds: float = OUTCOME_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.indexed = 0
+        self.batches = 0
+        self.failed = 0
+        self._retrying = False
+
+    def submit(self, case: Dict[str, Any], outcome: Dict[str, Any]):
+        with self._lock:
+            self._pending.append((dict(case), dict(outcome)))
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # A failed batch waits out the interval too, so a full requeue doesn't spin
+            if self.pending() < self.batch_size or self._retrying:
+                await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Index everything pending now; returns the number of outcomes indexed"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            # Latest outcome wins if a case was resolved twice before the flush
+            latest = {case["id"]: (case, outcome) for case, outcome in batch}
+            items = list(latest.values())
+            try:
+                await asyncio.to_thread(rag.add_cases_bulk, items, self.batch_size)
+            except Exception as e:
+                print(f"Outcome ingestion failed, requeueing {len(items)}: {e}")
+                self.failed += len(items)
+                self._retrying = True
+                with self._lock:
+                    self._pending[:0] = items
+                # Retry after the next flush interval instead of waiting for a new submit()
+                if self._wakeup is not None:
+                    self._wakeup.set()
+                return 0
+
+            self._retrying = False
+            self.indexed += len(items)
+            self.batches += (len(items) + self.batch_size - 1) // self.batch_size
+            return len(items)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "indexed": self.indexed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "batch_size": self.batch_size,
+            "flush_seconds": self.flush_seconds
+        }
+
+
+# Global instance
+outcome_queue = OutcomeIngestionQueue()
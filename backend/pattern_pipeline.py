@@ -0,0 +1,193 @@
+"""
+Pattern Pipeline - map-reduce pattern detection over the whole caseload
+Local group-bys first, then bounded chunks sent to the LLM concurrently and merged
+"""
+
+import os
+import json
+import asyncio
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, AsyncGenerator
+from llm_client import llm_client
+from prompt_builder import prompt_builder
+
+PATTERN_CHUNK_SIZE = int(os.getenv("PATTERN_CHUNK_SIZE", "500"))
+# Offline mode derives insights from the group-bys instead of calling the LLM
+PATTERN_PIPELINE_MOCK = os.getenv("PATTERN_PIPELINE_MOCK", "false" if os.getenv("GROQ_API_KEY") else "true").lower() == "true"
+PATTERN_MAX_INSIGHTS = 10
+
+# Cases carry no location, so there is no geographic group-by
+GROUP_FIELDS = ("employer", "category", "urgency")
+URGENT = ("critical", "high")
+SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+MAP_TEMPLATE = """Analyze this summary of one slice of a financial assistance caseload for patterns:
+
+{summary}
+
+Respond with ONLY JSON:
+{{
+  "insights": [
+    {{
+      "type": "employer_issue|geographic|demographic|systemic",
+      "severity": "critical|high|medium|low",
+      "subject": "the employer, location or category the pattern is about",
+      "description": "Clear pattern description",
+      "affected_cases": 3,
+      "recommendation": "Actionable step",
+      "examples": ["case_1", "case_2"]
+    }}
+  ],
+  "trends": {{
+    "increasing": ["category names"],
+    "stable": ["category names"]
+  }}
+}}"""
+
+
+def _group_keys(case: Dict[str, Any], field: str) -> List[str]:
+    if field == "category":
+        return case.get("categories") or ["general"]
+    return [case.get(field) or "unknown"]
+
+
+def group_by(cases: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """field -> value -> {cases, urgent, examples}, computed locally"""
+    groups: Dict[str, Dict[str, Dict[str, Any]]] = {field: {} for field in GROUP_FIELDS}
+    for case in cases:
+        urgent = case.get("urgency") in URGENT
+        for field in GROUP_FIELDS:
+            for key in _group_keys(case, field):
+                group = groups[field].setdefault(key, {"cases": 0, "urgent": 0, "examples": []})
+                group["cases"] += 1
+                group["urgent"] += urgent
+                if len(group["examples"]) < 3:
+                    group["examples"].append(case.get("id"))
+    return groups
+
+
+def mock_insights(groups: Dict[str, Dict[str, Dict[str, Any]]], total_cases: int) -> Dict[str, Any]:
+    """Deterministic stand-in for the LLM map step, over the whole caseload's group-bys
+
+    Thresholds need caseload-wide counts; applied per chunk they would
+    miss employers whose cases are spread across chunks.
+    """
+    total = total_cases or 1
+    insights = []
+
+    for employer, group in groups["employer"].items():
+        if group["cases"] >= 2 and group["urgent"] / group["cases"] >= 0.5:
+            insights.append({
+                "type": "employer_issue",
+                "severity": "high" if group["urgent"] / group["cases"] >= 0.75 else "medium",
+                "subject": employer,
+                "description": f"{employer}: {group['urgent']} of {group['cases']} cases are urgent",
+                "affected_cases": group["urgent"],
+                "recommendation": f"Review pay and benefits at {employer} with HR",
+                "examples": group["examples"]
+            })
+
+    for category, group in groups["category"].items():
+        if category != "general" and group["cases"] / total >= 0.3:
+            insights.append({
+                "type": "systemic",
+                "severity": "high" if group["urgent"] / group["cases"] >= 0.5 else "medium",
+                "subject": category,
+                "description": f"{category} need in {group['cases'] / total:.0%} of cases",
+                "affected_cases": group["cases"],
+                "recommendation": f"Prioritize {category} resources and partnerships",
+                "examples": group["examples"]
+            })
+
+    return {"insights": insights, "trends": {}}
+
+
+def merge_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce step: combine insights about the same subject across chunks"""
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    trends: Dict[str, Counter] = defaultdict(Counter)
+
+    for partial in partials:
+        for insight in partial.get("insights") or []:
+            key = (insight.get("type"), str(insight.get("subject") or insight.get("description", "")).lower())
+            current = merged.get(key)
+            if current is None:
+                merged[key] = dict(insight, examples=list(insight.get("examples") or [])[:5])
+                continue
+            current["affected_cases"] = (current.get("affected_cases") or 0) + (insight.get("affected_cases") or 0)
+            if SEVERITY_ORDER.get(insight.get("severity"), 9) < SEVERITY_ORDER.get(current.get("severity"), 9):
+                current["severity"] = insight["severity"]
+            for example in insight.get("examples") or []:
+                if len(current["examples"]) < 5 and example not in current["examples"]:
+                    current["examples"].append(example)
+
+        for direction, categories in (partial.get("trends") or {}).items():
+            trends[direction].update(categories)
+
+    insights = sorted(
+        merged.values(),
+        key=lambda i: (SEVERITY_ORDER.get(i.get("severity"), 9), -(i.get("affected_cases") or 0))
+    )
+    return {
+        "insights": insights[:PATTERN_MAX_INSIGHTS],
+        "trends": {direction: [c for c, _ in counts.most_common()] for direction, counts in trends.items()}
+    }
+
+
+class PatternPipeline:
+
+    def __init__(self, chunk_size: int = PATTERN_CHUNK_SIZE, mock: bool = PATTERN_PIPELINE_MOCK):
+        self.chunk_size = chunk_size
+        self.mock = mock
+
+    async def _map_chunk(self, chunk: List[Dict[str, Any]], bypass_cache: bool) -> Dict[str, Any]:
+        prompt = await asyncio.to_thread(prompt_builder.patterns_prompt, chunk, MAP_TEMPLATE)
+        try:
+            content = await llm_client.complete(prompt, max_tokens=1000, bypass_cache=bypass_cache)
+            content = content.replace("```json", "").replace("```", "").strip()
+            return json.loads(content)
+        except Exception as e:
+            print(f"Pattern chunk failed: {e}")
+            return {"insights": [], "trends": {}}
+
+    async def run(self, cases: List[Dict[str, Any]], bypass_cache: bool = False) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yields progress events, ending with {"done": True, "result": ...}"""
+        groups = await asyncio.to_thread(group_by, cases)
+        yield {
+            "stage": "group_by",
+            "total_cases": len(cases),
+            "groups": {field: len(values) for field, values in groups.items()}
+        }
+
+        if self.mock:
+            # One pass over the global groups rather than a map per chunk
+            partials = [await asyncio.to_thread(mock_insights, groups, len(cases))]
+            yield {"stage": "map", "completed": 1, "total": 1}
+        else:
+            chunks = [cases[i:i + self.chunk_size] for i in range(0, len(cases), self.chunk_size)]
+            tasks = [asyncio.create_task(self._map_chunk(chunk, bypass_cache)) for chunk in chunks]
+            partials = []
+            try:
+                for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                    partials.append(await task)
+                    yield {"stage": "map", "completed": completed, "total": len(chunks)}
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        result = merge_partials(partials)
+        result["groups"] = groups
+        result["mock"] = self.mock
+        yield {"stage": "reduce", "insights": len(result["insights"])}
+        yield {"done": True, "result": result}
+
+    async def detect(self, cases: List[Dict[str, Any]], bypass_cache: bool = False) -> Dict[str, Any]:
+        result = {}
+        async for event in self.run(cases, bypass_cache):
+            if event.get("done"):
+                result = event["result"]
+        return result
+
+
+# Global instance
+pattern_pipeline = PatternPipeline()
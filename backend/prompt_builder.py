@@ -0,0 +1,163 @@
+"""
+Prompt Builder - bounded-context prompts for AIService
+RAG-prefiltered candidates, compact JSON and a token budget per prompt
+"""
+
+import os
+import json
+from collections import Counter, defaultdict
+from typing import Dict, List, Any
+from rag_system import rag
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_MAX_RESOURCES = int(os.getenv("PROMPT_MAX_RESOURCES", "15"))
+# Case fields that are too long or irrelevant to send as-is
+CASE_EXCLUDED_FIELDS = ("messages", "documents_text", "documents", "notes")
+RECENT_MESSAGES = 3
+MESSAGE_CHARS = 500
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count - about four characters per token for English"""
+    return len(text) // 4 + 1
+
+
+class PromptBuilder:
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET, max_resources: int = PROMPT_MAX_RESOURCES):
+        self.token_budget = token_budget
+        self.max_resources = max_resources
+
+    @staticmethod
+    def case_context(case: Dict[str, Any]) -> Dict[str, Any]:
+        """Case fields worth sending, with only the latest messages trimmed"""
+        context = {k: v for k, v in case.items() if k not in CASE_EXCLUDED_FIELDS}
+        messages = case.get("messages") or []
+        if messages:
+            context["recent_messages"] = [
+                {"sender": m.get("sender"), "content": (m.get("content") or "")[:MESSAGE_CHARS]}
+                for m in messages[-RECENT_MESSAGES:]
+            ]
+        return context
+
+    @staticmethod
+    def _case_query(case: Dict[str, Any]) -> str:
+        parts = list(case.get("categories") or [])
+        messages = case.get("messages") or []
+        if messages:
+            parts.append(messages[-1].get("content") or "")
+        if case.get("situation"):
+            parts.append(str(case["situation"]))
+        return " ".join(parts)
+
+    def candidate_resources(self, case: Dict[str, Any], resources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resources ordered by RAG relevance to the case, capped at max_resources"""
+        if len(resources) <= self.max_resources:
+            return resources
+
+        by_id = {r.get("id"): r for r in resources}
+        try:
+            results = rag.search_resources(self._case_query(case), n_results=self.max_resources)
+            ranked = [by_id[rid] for rid in results["ids"][0] if rid in by_id]
+        except Exception as e:
+            print(f"Resource prefilter failed, using catalog order: {e}")
+            ranked = []
+
+        if len(ranked) < self.max_resources:
+            seen = {r.get("id") for r in ranked}
+            ranked.extend(r for r in resources if r.get("id") not in seen)
+        return ranked[:self.max_resources]
+
+    def fit(self, items: List[Any], reserved_tokens: int) -> List[Any]:
+        """Longest prefix of items whose compact JSON fits the remaining budget
+
+        Always keeps the first item so the prompt is never empty.
+        """
+        remaining = self.token_budget - reserved_tokens
+        kept = []
+        for item in items:
+            cost = estimate_tokens(compact_json(item)) + 1
+            if kept and cost > remaining:
+                break
+            kept.append(item)
+            remaining -= cost
+        return kept
+
+    def recommend_prompt(self, case: Dict[str, Any], resources: List[Dict[str, Any]], template: str) -> str:
+        """template has {case} and {resources} placeholders"""
+        case_json = compact_json(self.case_context(case))
+        reserved = estimate_tokens(template) + estimate_tokens(case_json)
+        selected = self.fit(self.candidate_resources(case, resources), reserved)
+        return template.format(case=case_json, resources=compact_json(selected))
+
+    @staticmethod
+    def summarize_cases(cases: List[Dict[str, Any]], top_n: int = 10, examples: int = 3) -> Dict[str, Any]:
+        """Pre-aggregated caseload statistics instead of raw case records"""
+        urgency = Counter()
+        status = Counter()
+        categories = Counter()
+        category_examples = defaultdict(list)
+        employers: Dict[str, Dict[str, Any]] = {}
+        totals = Counter()
+
+        for case in cases:
+            urgency[case.get("urgency", "unknown")] += 1
+            status[case.get("status", "unknown")] += 1
+            for category in case.get("categories") or []:
+                categories[category] += 1
+                if len(category_examples[category]) < examples:
+                    category_examples[category].append(case.get("id"))
+
+            snapshot = case.get("financial_snapshot") or {}
+            for field in ("annual_income", "total_debt", "credit_score", "savings", "dependents"):
+                totals[field] += snapshot.get(field) or 0
+
+            employer = employers.setdefault(case.get("employer", "unknown"), {
+                "cases": 0, "urgent": 0, "debt": 0, "categories": Counter()
+            })
+            employer["cases"] += 1
+            employer["urgent"] += case.get("urgency") in ("critical", "high")
+            employer["debt"] += snapshot.get("total_debt") or 0
+            employer["categories"].update(case.get("categories") or [])
+
+        count = len(cases)
+        top_employers = sorted(employers.items(), key=lambda item: item[1]["cases"], reverse=True)[:top_n]
+        return {
+            "total_cases": count,
+            "urgency": dict(urgency),
+            "status": dict(status),
+            "categories": [
+                {"category": c, "cases": n, "examples": category_examples[c]}
+                for c, n in categories.most_common(top_n)
+            ],
+            "averages": {field: round(total / count, 1) for field, total in totals.items()} if count else {},
+            "employers": [
+                {
+                    "employer": name,
+                    "cases": e["cases"],
+                    "urgent": e["urgent"],
+                    "avg_debt": round(e["debt"] / e["cases"]),
+                    "top_categories": [c for c, _ in e["categories"].most_common(3)]
+                }
+                for name, e in top_employers
+            ]
+        }
+
+    def patterns_prompt(self, cases: List[Dict[str, Any]], template: str) -> str:
+        """template has a {summary} placeholder"""
+        reserved = estimate_tokens(template)
+        top_n = 10
+        summary = compact_json(self.summarize_cases(cases, top_n=top_n))
+        # Shrink the group lists until the summary fits
+        while top_n > 1 and reserved + estimate_tokens(summary) > self.token_budget:
+            top_n //= 2
+            summary = compact_json(self.summarize_cases(cases, top_n=top_n, examples=1))
+        return template.format(summary=summary)
+
+
+# Global instance
+prompt_builder = PromptBuilder()
@@ -1,37 +1,319 @@
-import chromadb
-from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer
+import re
 import json
-from typing import List, Dict, Any
+import math
+import time
+import heapq
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Callable, Generic, TypeVar
 import os
 
-# Initialize ChromaDB
-chroma_client = chromadb.Client()
+# Directory for a persistent index; unset keeps the in-memory client
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR")
 
 # Use sentence transformers for FREE embeddings (no API needed)
-model = SentenceTransformer('all-MiniLM-L6-v2')  # small and fast
+EMBED_MODEL_NAME = 'all-MiniLM-L6-v2'  # small and fast
+
+T = TypeVar("T")
+
+class LazyProvider(Generic[T]):
+    """Builds a heavy dependency on first use, exactly once, from any thread"""
+    
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+    
+    def get(self) -> T:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    self.load_seconds = time.perf_counter() - started
+        return self._instance
+    
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "load_seconds": self.load_seconds}
+
+# torch | onnx | onnx-int8 - all CPU; the ONNX ones need optimum[onnxruntime]
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Pre-quantized export shipped with the model; pick the one matching the CPU
+EMBEDDING_INT8_FILE = os.getenv("EMBEDDING_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+class EmbeddingBackend:
+    """SentenceTransformer with a given inference backend
+    
+    All backends load the same model and produce comparable vectors;
+    benchmarks/eval_embedding_backends.py checks recall parity.
+    """
+    name = "torch"
+    
+    def __init__(self, model_name: str = EMBED_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu", **self.model_options())
+    
+    def model_options(self) -> Dict[str, Any]:
+        return {}
+    
+    def encode(self, texts, batch_size: int = 32):
+        return self.model.encode(texts, batch_size=batch_size)
+
+class OnnxBackend(EmbeddingBackend):
+    name = "onnx"
+    
+    def model_options(self) -> Dict[str, Any]:
+        return {"backend": "onnx", "model_kwargs": {"provider": "CPUExecutionProvider"}}
+
+class QuantizedOnnxBackend(EmbeddingBackend):
+    name = "onnx-int8"
+    
+    def model_options(self) -> Dict[str, Any]:
+        return {
+            "backend": "onnx",
+            "model_kwargs": {"provider": "CPUExecutionProvider", "file_name": EMBEDDING_INT8_FILE}
+        }
+
+EMBEDDING_BACKENDS = {
+    backend.name: backend for backend in (EmbeddingBackend, OnnxBackend, QuantizedOnnxBackend)
+}
+
+def create_embedding_backend(name: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {name!r}, expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name]()
+
+def _create_vector_store():
+    import chromadb
+    if CHROMA_PERSIST_DIR:
+        return chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+    return chromadb.Client()
+
+# Nothing heavy is imported or loaded until first use (or warm_up)
+embedder: LazyProvider = LazyProvider("embedder", create_embedding_backend)
+vector_store: LazyProvider = LazyProvider("vector_store", _create_vector_store)
+
+# Items per encode / collection.add call for bulk ingestion
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Max cached query embeddings (0 disables the cache)
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class EmbeddingCache:
+    """Bounded LRU cache of embeddings keyed by a hash of the normalized text"""
+    
+    def __init__(self, max_entries: int = EMBED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(text: str) -> str:
+        # Whitespace doesn't change the tokenization, so collapse it
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+    
+    def put(self, text: str, embedding: List[float]):
+        if self.max_entries <= 0:
+            return
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, text: Optional[str] = None):
+        """Drop one text's embedding, or everything when no text is given"""
+        with self._lock:
+            if text is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(text), None)
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+# Reciprocal rank fusion constant: higher flattens the contribution of top ranks
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring
+    
+    Keeps a small metadata dict per document so category / location
+    filters can be applied before scoring.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._doc_len)
+    
+    def _remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self.metadata.pop(doc_id, None)
+    
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Index or re-index a document"""
+        tokens = tokenize(text)
+        terms: Dict[str, int] = {}
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = len(tokens)
+            self._total_len += len(tokens)
+            self.metadata[doc_id] = metadata or {}
+    
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+    
+    def filter_ids(self, **filters) -> Optional[set]:
+        """Ids whose metadata matches every non-None filter, None if unfiltered"""
+        filters = {k: v for k, v in filters.items() if v is not None}
+        if not filters:
+            return None
+        return {
+            doc_id for doc_id, metadata in self.metadata.items()
+            if all(metadata.get(k) == v for k, v in filters.items())
+        }
+    
+    def search(self, query: str, n_results: int = 10, allowed: Optional[set] = None) -> List[Tuple[str, float]]:
+        """Top (doc id, score) pairs, restricted to allowed ids if given"""
+        with self._lock:
+            count = len(self._doc_len)
+            if not count:
+                return []
+            avg_len = self._total_len / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
 
 class RAGSystem:
     def __init__(self):
-        # Create collections
-        self.resources_collection = chroma_client.create_collection(
-            name="financial_resources",
-            metadata={"description": "Financial assistance resources"}
-        )
-        
-        self.cases_collection = chroma_client.create_collection(
-            name="past_cases",
-            metadata={"description": "Historical case outcomes"}
-        )
+        self.embedding_cache = EmbeddingCache()
+        self._collections: Dict[str, Any] = {}
+        # Lexical twin of the resources collection, rebuilt on every sync
+        self.bm25 = BM25Index()
+    
+    def _collection(self, name: str, description: str):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = vector_store.get().get_or_create_collection(
+                name=name,
+                metadata={"description": description}
+            )
+            self._collections[name] = collection
+        return collection
+    
+    @property
+    def resources_collection(self):
+        return self._collection("financial_resources", "Financial assistance resources")
+    
+    @property
+    def cases_collection(self):
+        return self._collection("past_cases", "Historical case outcomes")
+    
+    def warm_up(self):
+        """Load the embedder and open the collections ahead of the first request"""
+        embedder.get()
+        self.resources_collection
+        self.cases_collection
     
     def embed_text(self, text: str) -> List[float]:
-        """Generate embeddings using sentence transformers"""
-        return model.encode(text).tolist()
+        """Generate embeddings using sentence transformers (LRU cached)"""
+        embedding = self.embedding_cache.get(text)
+        if embedding is None:
+            embedding = embedder.get().encode(text).tolist()
+            self.embedding_cache.put(text, embedding)
+        return embedding
     
-    def add_resource(self, resource: Dict[str, Any]):
-        """Add a resource to vector DB"""
+    def embed_texts(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Generate embeddings for many texts in batched forward passes"""
+        if not texts:
+            return []
+        return embedder.get().encode(texts, batch_size=batch_size or EMBED_BATCH_SIZE).tolist()
+    
+    def embed_queries(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Like embed_texts, but served from the LRU cache where possible"""
+        embeddings = [self.embedding_cache.get(text) for text in texts]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        for i, embedding in zip(misses, self.embed_texts([texts[i] for i in misses], batch_size)):
+            self.embedding_cache.put(texts[i], embedding)
+            embeddings[i] = embedding
+        return embeddings
+    
+    @staticmethod
+    def _resource_text(resource: Dict[str, Any]) -> str:
         # Create rich description for better matching
-        text = f"""
+        return f"""
         {resource['name']}. {resource['description']}
         Eligibility: {resource['eligibility_criteria']}
         Category: {resource['category']}
@@ -39,37 +321,188 @@ class RAGSystem:
         Max amount: ${resource.get('max_amount', 'varies')}
         Approval time: {resource['typical_approval_time']}
         """
-        
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Identifies an embedding: changes with the text, model or backend"""
+        return hashlib.sha256(f"{EMBED_MODEL_NAME}:{EMBEDDING_BACKEND}\n{text}".encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _resource_metadata(resource: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = {
+            "name": resource['name'],
+            "category": resource['category'],
+            "location": resource.get('location', 'National'),
+            "max_amount": resource.get('max_amount', 0) or 0,
+            "success_rate": resource['success_rate'],
+            "approval_time": resource['typical_approval_time']
+        }
+        # Hash the metadata too, so filter fields added later get written back
+        metadata["content_hash"] = RAGSystem.content_hash(
+            RAGSystem._resource_text(resource) + json.dumps(metadata, sort_keys=True)
+        )
+        return metadata
+    
+    def _index_lexical(self, resources: List[Dict[str, Any]]):
+        for resource in resources:
+            self.bm25.add(
+                resource['id'],
+                self._resource_text(resource),
+                {"category": resource['category'], "location": resource.get('location', 'National')}
+            )
+    
+    def add_resource(self, resource: Dict[str, Any]):
+        """Add a resource to vector DB"""
+        text = self._resource_text(resource)
         embedding = self.embed_text(text)
         
         self.resources_collection.add(
             ids=[resource['id']],
             embeddings=[embedding],
             documents=[text],
-            metadatas=[{
-                "name": resource['name'],
-                "category": resource['category'],
-                "max_amount": resource.get('max_amount', 0) or 0,
-                "success_rate": resource['success_rate'],
-                "approval_time": resource['typical_approval_time']
-            }]
+            metadatas=[self._resource_metadata(resource)]
         )
+        self._index_lexical([resource])
+    
+    def add_resources_bulk(self, resources: List[Dict[str, Any]], batch_size: Optional[int] = None):
+        """Add many resources - one encode and one collection.add per chunk"""
+        batch_size = batch_size or EMBED_BATCH_SIZE
+        
+        for chunk in _chunks(resources, batch_size):
+            texts = [self._resource_text(r) for r in chunk]
+            embeddings = self.embed_texts(texts, batch_size)
+            
+            self.resources_collection.add(
+                ids=[r['id'] for r in chunk],
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=[self._resource_metadata(r) for r in chunk]
+            )
+        self._index_lexical(resources)
+    
+    def sync_resources(self, resources: List[Dict[str, Any]], batch_size: Optional[int] = None, prune: bool = True) -> Dict[str, int]:
+        """Make the index match resources, re-embedding only what changed
+        
+        Stored content hashes are compared with the current resource text,
+        so a warm persistent index skips the encode entirely. With prune,
+        resources no longer in the list are deleted from the index.
+        """
+        batch_size = batch_size or EMBED_BATCH_SIZE
+        wanted = {r['id']: r for r in resources}
+        
+        stored = self.resources_collection.get(include=["metadatas"])
+        stored_hashes = {
+            rid: (metadata or {}).get("content_hash")
+            for rid, metadata in zip(stored["ids"], stored["metadatas"])
+        }
+        
+        changed = [
+            r for rid, r in wanted.items()
+            if stored_hashes.get(rid) != self._resource_metadata(r)["content_hash"]
+        ]
+        stale = [rid for rid in stored_hashes if rid not in wanted] if prune else []
+        
+        for chunk in _chunks(changed, batch_size):
+            texts = [self._resource_text(r) for r in chunk]
+            self.resources_collection.upsert(
+                ids=[r['id'] for r in chunk],
+                embeddings=self.embed_texts(texts, batch_size),
+                documents=texts,
+                metadatas=[self._resource_metadata(r) for r in chunk]
+            )
+        if stale:
+            self.resources_collection.delete(ids=stale)
+        
+        # BM25 lives in memory, so it is rebuilt even when the embeddings were warm
+        self._index_lexical(resources)
+        for rid in stale:
+            self.bm25.remove(rid)
+        
+        return {
+            "unchanged": len(wanted) - len(changed),
+            "embedded": len(changed),
+            "removed": len(stale)
+        }
     
     def search_resources(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Semantic search for resources"""
         query_embedding = self.embed_text(query)
-        
-        results = self.resources_collection.query(
+        return self.search_resources_by_embedding(query_embedding, n_results)
+    
+    def _resource_n_results(self, n_results: int) -> int:
+        # Asking Chroma for more hits than the collection holds logs a warning per query
+        return max(1, min(n_results, self.resources_collection.count()))
+    
+    def search_resources_by_embedding(self, query_embedding: List[float], n_results: int = 5) -> Dict[str, Any]:
+        """Semantic search with a precomputed query embedding"""
+        return self.resources_collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=self._resource_n_results(n_results)
         )
+    
+    def search_resources_batch(self, queries: List[str], n_results: int = 5, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Semantic search for many queries: one batched encode, one multi-query lookup"""
+        if not queries:
+            return {"ids": [], "distances": [], "metadatas": []}
+        return self.resources_collection.query(
+            query_embeddings=self.embed_queries(queries, batch_size),
+            n_results=self._resource_n_results(n_results)
+        )
+    
+    def hybrid_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        category: Optional[str] = None,
+        location: Optional[str] = None,
+        candidates: int = 50
+    ) -> Dict[str, Any]:
+        """BM25 + dense search fused with reciprocal rank fusion
         
-        return results
+        Category / location filters are applied before either ranker
+        scores anything. Each ranker contributes its top candidates and a
+        document's fused score is the sum of 1 / (HYBRID_RRF_K + rank).
+        """
+        allowed = self.bm25.filter_ids(category=category, location=location)
+        if allowed is not None and not allowed:
+            return {"ids": [[]], "distances": [[]], "metadatas": [[]], "scores": [[]]}
+        
+        lexical = self.bm25.search(query, candidates, allowed)
+        
+        clauses = [{k: v} for k, v in (("category", category), ("location", location)) if v is not None]
+        where = clauses[0] if len(clauses) == 1 else ({"$and": clauses} if clauses else None)
+        size = self.resources_collection.count() if allowed is None else len(allowed)
+        dense = self.resources_collection.query(
+            query_embeddings=[self.embed_text(query)],
+            n_results=max(1, min(candidates, size)),
+            where=where
+        ) if size else {"ids": [[]], "distances": [[]], "metadatas": [[]]}
+        
+        fused: Dict[str, float] = {}
+        for rank, (rid, _) in enumerate(lexical, start=1):
+            fused[rid] = fused.get(rid, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+        for rank, rid in enumerate(dense["ids"][0], start=1):
+            fused[rid] = fused.get(rid, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+        top = heapq.nlargest(n_results, fused.items(), key=lambda item: item[1])
+        
+        distances = dict(zip(dense["ids"][0], dense["distances"][0]))
+        metadatas = dict(zip(dense["ids"][0], dense["metadatas"][0]))
+        missing = [rid for rid, _ in top if rid not in metadatas]
+        if missing:
+            stored = self.resources_collection.get(ids=missing, include=["metadatas"])
+            metadatas.update(zip(stored["ids"], stored["metadatas"]))
+        
+        return {
+            "ids": [[rid for rid, _ in top]],
+            "distances": [[distances.get(rid) for rid, _ in top]],
+            "metadatas": [[metadatas.get(rid) for rid, _ in top]],
+            "scores": [[score for _, score in top]]
+        }
     
-    def add_case(self, case: Dict[str, Any], outcome: Dict[str, Any]):
-        """Store a case with its outcome for future reference"""
+    @staticmethod
+    def _case_text(case: Dict[str, Any], outcome: Dict[str, Any]) -> str:
         # Create searchable description
-        text = f"""
+        return f"""
         Employee: {case['employee_name']} at {case['employer']}
         Income: ${case['financial_snapshot']['annual_income']}
         Credit: {case['financial_snapshot']['credit_score']}
@@ -79,23 +512,80 @@ class RAGSystem:
         Resources used: {', '.join(outcome.get('resources_used', []))}
         Success: {outcome.get('success', False)}
         """
+    
+    @staticmethod
+    def _case_metadata(case: Dict[str, Any], outcome: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = {
+            "employee_name": case['employee_name'],
+            "employer": case['employer'],
+            "urgency": case['urgency'],
+            "success": outcome.get('success', False)
+        }
+        metadata["content_hash"] = RAGSystem.content_hash(
+            RAGSystem._case_text(case, outcome) + json.dumps(metadata, sort_keys=True)
+        )
+        return metadata
+    
+    def add_case(self, case: Dict[str, Any], outcome: Dict[str, Any]):
+        """Store a case with its outcome for future reference"""
+        text = self._case_text(case, outcome)
         
         embedding = self.embed_text(text)
         
-        self.cases_collection.add(
+        self.cases_collection.upsert(
             ids=[f"case_{case['id']}"],
             embeddings=[embedding],
             documents=[text],
-            metadatas={
-                "employee_name": case['employee_name'],
-                "employer": case['employer'],
-                "urgency": case['urgency'],
-                "success": outcome.get('success', False)
-            }
+            metadatas=[self._case_metadata(case, outcome)]
         )
     
-    def find_similar_cases(self, current_case: Dict[str, Any], n_results: int = 3) -> List[Dict[str, Any]]:
-        """Find similar past cases to learn from"""
+    def add_cases_bulk(self, cases: List[Tuple[Dict[str, Any], Dict[str, Any]]], batch_size: Optional[int] = None):
+        """Add many (case, outcome) pairs - one encode and one collection.upsert per chunk"""
+        batch_size = batch_size or EMBED_BATCH_SIZE
+        
+        for chunk in _chunks(cases, batch_size):
+            texts = [self._case_text(case, outcome) for case, outcome in chunk]
+            embeddings = self.embed_texts(texts, batch_size)
+            
+            self.cases_collection.upsert(
+                ids=[f"case_{case['id']}" for case, _ in chunk],
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=[self._case_metadata(case, outcome) for case, outcome in chunk]
+            )
+    
+    def sync_cases(self, cases: List[Tuple[Dict[str, Any], Dict[str, Any]]], batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Backfill past_cases from persisted outcomes, re-embedding only what changed
+        
+        Like sync_resources, but nothing is pruned: the index only grows as
+        cases are resolved.
+        """
+        stored = self.cases_collection.get(include=["metadatas"])
+        stored_hashes = {
+            cid: (metadata or {}).get("content_hash")
+            for cid, metadata in zip(stored["ids"], stored["metadatas"])
+        }
+        
+        changed = [
+            (case, outcome) for case, outcome in cases
+            if stored_hashes.get(f"case_{case['id']}") != self._case_metadata(case, outcome)["content_hash"]
+        ]
+        self.add_cases_bulk(changed, batch_size)
+        
+        return {"unchanged": len(cases) - len(changed), "embedded": len(changed)}
+    
+    def find_similar_cases(
+        self,
+        current_case: Dict[str, Any],
+        n_results: int = 3,
+        urgency: Optional[str] = None,
+        success: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """Find similar past cases to learn from
+        
+        urgency / success restrict the search to matching outcomes via a
+        metadata prefilter, so only that slice of past_cases is ranked.
+        """
         query = f"""
         Income: ${current_case['financial_snapshot']['annual_income']}
         Credit: {current_case['financial_snapshot']['credit_score']}
@@ -103,14 +593,29 @@ class RAGSystem:
         Urgency: {current_case['urgency']}
         """
         
+        filters = []
+        if urgency is not None:
+            filters.append({"urgency": urgency})
+        if success is not None:
+            filters.append({"success": success})
+        where = None
+        if len(filters) == 1:
+            where = filters[0]
+        elif filters:
+            where = {"$and": filters}
+        
+        empty = {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+        available = self.cases_collection.count()
+        if not available:
+            return empty
+        
         query_embedding = self.embed_text(query)
         
-        results = self.cases_collection.query(
+        return self.cases_collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=min(n_results, available),
+            where=where
         )
-        
-        return results
 
 # Global instance
 rag = RAGSystem()
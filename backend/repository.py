@@ -0,0 +1,549 @@
+"""
+Case Repository - persistence for cases, messages, documents, resources and outcomes
+Wraps the SQLAlchemy models in database.py and hands plain dicts to the API layer
+"""
+
+import json
+import base64
+import binascii
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+from sqlalchemy import select, insert, func, text, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from database import SessionLocal, Case, Message, Document, Resource, CaseOutcome, ChangeLog
+
+CASE_FIELDS = ["id", "employee_name", "employer", "urgency", "categories", "last_contact",
+               "status", "financial_snapshot", "open_actions", "sentiment"]
+RESOURCE_FIELDS = ["id", "name", "description", "category", "eligibility_criteria", "max_amount",
+                   "typical_approval_time", "application_difficulty", "success_rate", "contact_info", "location"]
+DOCUMENT_FIELDS = ["id", "filename", "file_path", "file_type", "size", "sha256", "status", "error", "extracted_text"]
+# Fields a case listing can be projected to; message_count is computed in SQL
+LIST_FIELDS = set(CASE_FIELDS) | {"messages", "documents_text", "outcome", "message_count"}
+
+# Most change-log entries returned by one changes_since call
+CHANGES_PAGE_MAX = 500
+# pg_advisory_xact_lock key serialising change-log writers on PostgreSQL
+CHANGE_LOG_LOCK_KEY = 7340201
+
+# Case listings are ordered most urgent first, then most recently contacted
+URGENCY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+
+def urgency_rank(urgency: Optional[str]) -> int:
+    """Value stored in cases.urgency_rank; unknown urgencies sort last"""
+    return URGENCY_RANK.get(urgency, len(URGENCY_RANK))
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor: the sort key of the last row on the page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_fields(fields: Optional[str]) -> Optional[set]:
+    """Comma-separated projection -> field set (None means every field)"""
+    if fields is None:
+        return None
+    wanted = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = wanted - LIST_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return wanted | {"id"}
+
+
+class CaseRepository:
+    """Reads and writes go through short sessions from the pooled SessionLocal
+
+    Case reads eager-load messages, documents and outcomes with
+    selectinload, so listing N cases is a fixed number of queries rather
+    than one per relationship per case.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """Session that commits on success and rolls back on error"""
+        session = self.session_factory()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _case_query():
+        return select(Case).options(
+            selectinload(Case.messages),
+            selectinload(Case.documents),
+            selectinload(Case.outcomes)
+        )
+
+    @staticmethod
+    def _lock_change_log(session: Session):
+        """On PostgreSQL, hold a transaction lock from the first change-log write until commit
+
+        Sequence values are assigned at insert rather than commit, so two
+        writers could commit versions out of order and a poller that has
+        seen the later one would skip the earlier. Holding the lock keeps
+        versions committing in order; SQLite already serialises writers.
+        """
+        if session.info.get("change_log_locked") or session.get_bind().dialect.name != "postgresql":
+            return
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+        session.info["change_log_locked"] = True
+
+    @classmethod
+    def _log(cls, session: Session, entity: str, entity_id: str, case_id: str):
+        """Record a write in the change log, in the same transaction as the write"""
+        cls._lock_change_log(session)
+        session.add(ChangeLog(entity=entity, entity_id=entity_id, case_id=case_id))
+
+    # Serialisation
+
+    @staticmethod
+    def message_to_dict(message: Message) -> Dict[str, Any]:
+        data = {
+            "id": message.id,
+            "sender": message.sender,
+            "content": message.content,
+            "timestamp": _iso(message.timestamp)
+        }
+        if message.ai_analysis is not None:
+            data["ai_analysis"] = message.ai_analysis
+        return data
+
+    @staticmethod
+    def document_to_dict(document: Document) -> Dict[str, Any]:
+        data = {
+            "id": document.id,
+            "filename": document.filename,
+            "file_type": document.file_type,
+            "size": document.size,
+            "sha256": document.sha256,
+            "uploaded_at": _iso(document.uploaded_at),
+            "status": document.status,
+            "has_text": bool(document.extracted_text and len(document.extracted_text) > 10)
+        }
+        if document.error:
+            data["error"] = document.error
+        return data
+
+    @staticmethod
+    def outcome_to_dict(outcome: CaseOutcome) -> Dict[str, Any]:
+        return {
+            "resolution": outcome.resolution,
+            "resources_used": outcome.resources_used or [],
+            "success": bool(outcome.success),
+            "credit_score_change": outcome.credit_score_change,
+            "money_saved": outcome.money_saved,
+            "resolved_at": _iso(outcome.resolved_at)
+        }
+
+    @classmethod
+    def case_to_dict(cls, case: Case, fields: Optional[set] = None, message_count: Optional[int] = None) -> Dict[str, Any]:
+        """Case in the shape the API and case_store use, optionally projected to fields"""
+        def wanted(name: str) -> bool:
+            return fields is None or name in fields
+
+        data = {
+            "id": case.id,
+            "employee_name": case.employee_name,
+            "employer": case.employer,
+            "urgency": case.urgency,
+            "categories": case.categories or [],
+            "last_contact": _iso(case.last_contact),
+            "status": case.status,
+            "financial_snapshot": case.financial_snapshot or {},
+            "open_actions": case.open_actions or []
+        }
+        # Relationships are only touched when requested, so projections skip loading them
+        if wanted("messages"):
+            data["messages"] = [cls.message_to_dict(m) for m in case.messages]
+        if case.sentiment is not None:
+            data["sentiment"] = case.sentiment
+        if wanted("documents_text"):
+            documents_text = [
+                {"filename": d.filename, "text": d.extracted_text}
+                for d in case.documents if d.extracted_text
+            ]
+            if documents_text:
+                data["documents_text"] = documents_text
+        if wanted("outcome") and case.outcomes:
+            data["outcome"] = cls.outcome_to_dict(case.outcomes[-1])
+        if message_count is not None:
+            data["message_count"] = message_count
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name in fields}
+        return data
+
+    @staticmethod
+    def _case_row(case: Dict[str, Any]) -> Dict[str, Any]:
+        row = {field: case.get(field) for field in CASE_FIELDS}
+        row["last_contact"] = _parse_time(row["last_contact"]) or datetime.utcnow()
+        row["urgency_rank"] = urgency_rank(row["urgency"])
+        return row
+
+    @staticmethod
+    def _message_row(case_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": message["id"],
+            "case_id": case_id,
+            "sender": message["sender"],
+            "content": message["content"],
+            "timestamp": _parse_time(message.get("timestamp")) or datetime.utcnow(),
+            "ai_analysis": message.get("ai_analysis")
+        }
+
+    # Cases
+
+    def count(self) -> int:
+        with self.session() as session:
+            return session.scalar(select(func.count()).select_from(Case))
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        with self.session() as session:
+            case = session.scalars(self._case_query().where(Case.id == case_id)).first()
+            return self.case_to_dict(case) if case else None
+
+    def list(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All cases in creation order, with messages / documents / outcome"""
+        query = self._case_query().order_by(Case.created_at, Case.id)
+        if status is not None:
+            query = query.where(Case.status == status)
+        with self.session() as session:
+            return [self.case_to_dict(case) for case in session.scalars(query)]
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[set] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One keyset page of cases, by urgency then last_contact (newest first)
+
+        The cursor carries (urgency rank, last_contact, id) of the previous
+        page's last row, so each page is a range scan of
+        ix_cases_listing_order rather than an OFFSET. Relationships outside
+        fields are not loaded.
+        """
+        def wanted(name: str) -> bool:
+            return fields is None or name in fields
+
+        query = select(Case)
+        loaders = [(Case.messages, "messages"), (Case.documents, "documents_text"), (Case.outcomes, "outcome")]
+        query = query.options(*[selectinload(rel) for rel, name in loaders if wanted(name)])
+        count_messages = fields is not None and "message_count" in fields
+        if count_messages:
+            message_count = (
+                select(func.count(Message.id)).where(Message.case_id == Case.id).correlate(Case).scalar_subquery()
+            )
+            query = query.add_columns(message_count)
+
+        if cursor is not None:
+            rank, last_contact, case_id = decode_cursor(cursor, 3)
+            if not isinstance(rank, int) or not isinstance(last_contact, str) or not isinstance(case_id, str):
+                raise ValueError("Invalid cursor")
+            last_contact = _parse_time(last_contact)
+            # The leading urgency_rank bound lets the index seek to the cursor
+            query = query.where(Case.urgency_rank >= rank, or_(
+                Case.urgency_rank > rank,
+                and_(Case.urgency_rank == rank, Case.last_contact < last_contact),
+                and_(Case.urgency_rank == rank, Case.last_contact == last_contact, Case.id > case_id)
+            ))
+        query = query.order_by(Case.urgency_rank, Case.last_contact.desc(), Case.id).limit(limit + 1)
+
+        with self.session() as session:
+            rows = session.execute(query).all()
+            more = len(rows) > limit
+            rows = rows[:limit]
+            cases = [
+                self.case_to_dict(row[0], fields, row[1] if count_messages else None)
+                for row in rows
+            ]
+
+        next_cursor = None
+        if more:
+            last = rows[-1][0]
+            next_cursor = encode_cursor(
+                last.urgency_rank, _iso(last.last_contact), last.id
+            )
+        return cases, next_cursor
+
+    def messages_page(
+        self,
+        case_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One keyset page of a case's messages, newest first"""
+        query = select(Message).where(Message.case_id == case_id)
+        if cursor is not None:
+            timestamp, message_id = decode_cursor(cursor, 2)
+            if not isinstance(timestamp, str) or not isinstance(message_id, str):
+                raise ValueError("Invalid cursor")
+            timestamp = _parse_time(timestamp)
+            query = query.where(or_(
+                Message.timestamp < timestamp,
+                and_(Message.timestamp == timestamp, Message.id < message_id)
+            ))
+        query = query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit + 1)
+
+        with self.session() as session:
+            messages = list(session.scalars(query))
+
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = encode_cursor(_iso(messages[-1].timestamp), messages[-1].id)
+        return [self.message_to_dict(m) for m in messages], next_cursor
+
+    def create(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        with self.session() as session:
+            session.add(Case(**self._case_row(case)))
+            self._log(session, "case", case["id"], case["id"])
+            for message in case.get("messages", []):
+                session.add(Message(**self._message_row(case["id"], message)))
+                self._log(session, "message", message["id"], case["id"])
+        return case
+
+    def update(self, case_id: str, **changes) -> None:
+        if "last_contact" in changes:
+            changes["last_contact"] = _parse_time(changes["last_contact"])
+        if "urgency" in changes:
+            changes["urgency_rank"] = urgency_rank(changes["urgency"])
+        with self.session() as session:
+            case = session.get(Case, case_id)
+            if case is None:
+                raise KeyError(case_id)
+            for field, value in changes.items():
+                setattr(case, field, value)
+            self._log(session, "case", case_id, case_id)
+
+    def add_message(self, case_id: str, message: Dict[str, Any]) -> None:
+        """Store a message and bump the case's last_contact"""
+        row = self._message_row(case_id, message)
+        with self.session() as session:
+            case = session.get(Case, case_id)
+            if case is None:
+                raise KeyError(case_id)
+            session.add(Message(**row))
+            case.last_contact = row["timestamp"]
+            self._log(session, "message", row["id"], case_id)
+            self._log(session, "case", case_id, case_id)
+
+    def get_notes(self, case_id: str) -> str:
+        with self.session() as session:
+            return session.scalar(select(Case.notes).where(Case.id == case_id)) or ""
+
+    def set_notes(self, case_id: str, notes: str) -> None:
+        with self.session() as session:
+            case = session.get(Case, case_id)
+            if case is None:
+                raise KeyError(case_id)
+            case.notes = notes
+            self._log(session, "note", case_id, case_id)
+
+    # Documents
+
+    def add_document(self, case_id: str, document: Dict[str, Any]) -> None:
+        row = {field: document.get(field) for field in DOCUMENT_FIELDS}
+        with self.session() as session:
+            session.add(Document(case_id=case_id, **row))
+            self._log(session, "document", row["id"], case_id)
+
+    def update_document(self, document_id: str, **changes) -> None:
+        with self.session() as session:
+            document = session.get(Document, document_id)
+            if document is None:
+                raise KeyError(document_id)
+            for field, value in changes.items():
+                setattr(document, field, value)
+            self._log(session, "document", document_id, document.case_id)
+            # Extracted text feeds the case's documents_text
+            self._log(session, "case", document.case_id, document.case_id)
+
+    def documents(self, case_id: str) -> List[Dict[str, Any]]:
+        query = select(Document).where(Document.case_id == case_id).order_by(Document.uploaded_at)
+        with self.session() as session:
+            return [self.document_to_dict(d) for d in session.scalars(query)]
+
+    def count_documents(self) -> int:
+        with self.session() as session:
+            return session.scalar(select(func.count()).select_from(Document))
+
+    # Outcomes
+
+    def record_outcome(self, case_id: str, **fields) -> Dict[str, Any]:
+        """Resolve a case into a CaseOutcome and queue it for the similar-case index"""
+        from outcome_ingestion import outcome_queue
+
+        with self.session() as session:
+            case = session.get(Case, case_id)
+            if case is None:
+                raise KeyError(case_id)
+            outcome = CaseOutcome(case_id=case_id, **fields)
+            case.status = "resolved"
+            session.add(outcome)
+            self._log(session, "case", case_id, case_id)
+        case = self.get(case_id)
+
+        outcome_queue.submit(case, case["outcome"])
+        return case
+
+    def resolved_cases(self) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(case, latest outcome) for every case with a recorded outcome"""
+        query = self._case_query().where(Case.outcomes.any()).order_by(Case.created_at, Case.id)
+        with self.session() as session:
+            cases = [self.case_to_dict(case) for case in session.scalars(query)]
+        return [(case, case["outcome"]) for case in cases]
+
+    # Change log
+
+    def current_version(self) -> int:
+        with self.session() as session:
+            return session.scalar(select(func.max(ChangeLog.version))) or 0
+
+    def changed_cases(self, version: int, limit: int = CHANGES_PAGE_MAX) -> Dict[str, Any]:
+        """Full current state of every case touched after version, for refreshing caches
+
+        Any change-log entity counts, since messages, notes and documents
+        all live on the case dict. total_documents is included when a
+        document changed.
+        """
+        with self.session() as session:
+            entries = session.execute(
+                select(ChangeLog.version, ChangeLog.entity, ChangeLog.case_id)
+                .where(ChangeLog.version > version).order_by(ChangeLog.version).limit(limit + 1)
+            ).all()
+            has_more = len(entries) > limit
+            entries = entries[:limit]
+            if not entries:
+                return {"version": version, "has_more": False, "cases": [], "total_documents": None}
+
+            case_ids = {case_id for _, _, case_id in entries}
+            cases = session.scalars(self._case_query().where(Case.id.in_(case_ids)))
+            total_documents = None
+            if any(entity == "document" for _, entity, _ in entries):
+                total_documents = session.scalar(select(func.count()).select_from(Document))
+            return {
+                "version": entries[-1][0],
+                "has_more": has_more,
+                "cases": [self.case_to_dict(case) for case in cases],
+                "total_documents": total_documents
+            }
+
+    def changes_since(self, version: int, limit: int = CHANGES_PAGE_MAX) -> Dict[str, Any]:
+        """Entities written after version, each once, in their current state
+
+        Cases come without messages or documents_text; new messages, notes
+        and documents are listed separately with their case_id. When has_more is set, call
+        again with the returned version. reset means the client is ahead
+        of this database (e.g. it was recreated) and should reload in full.
+        """
+        with self.session() as session:
+            entries = list(session.scalars(
+                select(ChangeLog).where(ChangeLog.version > version).order_by(ChangeLog.version).limit(limit + 1)
+            ))
+            has_more = len(entries) > limit
+            entries = entries[:limit]
+            current = entries[-1].version if entries else (session.scalar(select(func.max(ChangeLog.version))) or 0)
+
+            changed: Dict[str, Dict[str, None]] = {"case": {}, "message": {}, "note": {}, "document": {}}
+            for entry in entries:
+                changed[entry.entity][entry.entity_id] = None
+
+            case_fields = LIST_FIELDS - {"messages", "message_count", "documents_text"}
+            cases = session.scalars(
+                select(Case).where(Case.id.in_(changed["case"])).options(selectinload(Case.outcomes))
+            )
+            messages = session.scalars(
+                select(Message).where(Message.id.in_(changed["message"])).order_by(Message.timestamp, Message.id)
+            )
+            notes = session.execute(select(Case.id, Case.notes).where(Case.id.in_(changed["note"])))
+            documents = session.scalars(select(Document).where(Document.id.in_(changed["document"])))
+
+            return {
+                "version": current,
+                "has_more": has_more,
+                "reset": version > current,
+                "cases": [self.case_to_dict(case, case_fields) for case in cases],
+                "messages": [{**self.message_to_dict(m), "case_id": m.case_id} for m in messages],
+                "notes": [{"case_id": case_id, "notes": text or ""} for case_id, text in notes],
+                "documents": [{**self.document_to_dict(d), "case_id": d.case_id} for d in documents]
+            }
+
+    # Resources
+
+    def list_resources(self) -> List[Dict[str, Any]]:
+        with self.session() as session:
+            return [
+                {field: getattr(resource, field) for field in RESOURCE_FIELDS}
+                for resource in session.scalars(select(Resource).order_by(Resource.id))
+            ]
+
+    # Seeding
+
+    def seed_if_empty(self, cases: List[Dict[str, Any]], resources: List[Dict[str, Any]] = ()) -> bool:
+        """bulk_seed an empty database; safe when several workers start at once
+
+        The seed is one transaction, so a worker that loses the race hits
+        the unique ids the winner committed, rolls back entirely and
+        carries on with the winner's rows. Returns True if this call seeded.
+        """
+        if self.count():
+            return False
+        try:
+            self.bulk_seed(cases, resources)
+        except IntegrityError:
+            return False
+        return True
+
+    def bulk_seed(self, cases: List[Dict[str, Any]], resources: List[Dict[str, Any]] = ()) -> Dict[str, int]:
+        """Insert cases, their messages and resources with one executemany per table"""
+        case_rows = [self._case_row(case) for case in cases]
+        message_rows = [
+            self._message_row(case["id"], message)
+            for case in cases for message in case.get("messages", [])
+        ]
+        resource_rows = [{field: r.get(field) for field in RESOURCE_FIELDS} for r in resources]
+
+        with self.session() as session:
+            for model, rows in ((Case, case_rows), (Message, message_rows), (Resource, resource_rows)):
+                if rows:
+                    session.execute(insert(model), rows)
+            changes = [{"entity": "case", "entity_id": row["id"], "case_id": row["id"]} for row in case_rows]
+            changes += [{"entity": "message", "entity_id": row["id"], "case_id": row["case_id"]} for row in message_rows]
+            if changes:
+                self._lock_change_log(session)
+                session.execute(insert(ChangeLog), changes)
+        return {"cases": len(case_rows), "messages": len(message_rows), "resources": len(resource_rows)}
+
+
+# Global instance
+case_repository = CaseRepository()
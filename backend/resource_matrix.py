@@ -0,0 +1,183 @@
+"""
+Resource Matrix - the resource catalog as NumPy arrays for vectorized scoring
+Hard income/credit eligibility and relevance/success scoring for one or many cases
+"""
+
+import os
+import re
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+
+# Area median income for a 4-person household; override per deployment region
+AMI_BASE = float(os.getenv("AMI_BASE", "80000"))
+# HHS poverty guideline (48 states, 2024): base + per additional person
+FPL_BASE = 15060
+FPL_PER_PERSON = 5380
+# HUD household-size adjustment to the 4-person AMI, for 1..8 people
+AMI_HOUSEHOLD_ADJUST = np.array([0.7, 0.8, 0.9, 1.0, 1.08, 1.16, 1.24, 1.32])
+
+BASIS_NONE, BASIS_FPL, BASIS_AMI = 0, 1, 2
+# Only upper bounds are limits; "above 200% FPL" is not an income cap
+_INCOME_LIMIT = re.compile(
+    r"(?:at or below|below|under|up to|less than|no more than|not exceeding|<=|≤|<)\s*"
+    r"(\d+(?:\.\d+)?)\s*%\s*(ami|area median|fpl|federal poverty)"
+)
+_CREDIT_MINIMUM = re.compile(r"credit score\s*(?:of\s*)?(>=|>|at least|above|over|minimum(?: of)?)?\s*(\d{3})")
+_APPROVAL_TIME = re.compile(r"(\d+)(?:\s*-\s*(\d+))?\s*(day|week|month)")
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30}
+
+
+def parse_income_limit(criteria: str) -> Tuple[int, float]:
+    """(basis, percent) from text like 'Income below 150% federal poverty level'
+
+    Percentages without a below / under / up to style qualifier are not
+    treated as limits.
+    """
+    match = _INCOME_LIMIT.search((criteria or "").lower())
+    if not match:
+        return BASIS_NONE, 0.0
+    basis = BASIS_AMI if match.group(2) in ("ami", "area median") else BASIS_FPL
+    return basis, float(match.group(1))
+
+
+def parse_credit_minimum(criteria: str) -> float:
+    """Minimum credit score from text like 'Credit score >500' or 'credit score 580+'; 0 if none"""
+    match = _CREDIT_MINIMUM.search((criteria or "").lower())
+    if not match:
+        return 0.0
+    score = float(match.group(2))
+    return score + 1 if match.group(1) in (">", "above", "over") else score
+
+
+def parse_approval_days(text: str) -> float:
+    """Midpoint in days of '2-4 weeks', '1-3 days', ...; NaN if unknown"""
+    match = _APPROVAL_TIME.search((text or "").lower())
+    if not match:
+        return float("nan")
+    low = float(match.group(1))
+    high = float(match.group(2) or low)
+    return (low + high) / 2 * _UNIT_DAYS[match.group(3)]
+
+
+class ResourceMatrix:
+    """Column arrays over the catalog, one row per resource"""
+
+    def __init__(self, resources: Optional[List[Dict[str, Any]]] = None):
+        self.load(resources or [])
+
+    def load(self, resources: List[Dict[str, Any]]):
+        self.resources = list(resources)
+        self.ids = [r["id"] for r in self.resources]
+        self.index = {rid: row for row, rid in enumerate(self.ids)}
+        self.categories = sorted({r.get("category", "general") for r in self.resources})
+        category_col = {c: i for i, c in enumerate(self.categories)}
+
+        count = len(self.resources)
+        self.success_rate = np.array([r.get("success_rate", 0.0) for r in self.resources], dtype=float)
+        self.max_amount = np.array([r.get("max_amount") or 0 for r in self.resources], dtype=float)
+        self.approval_days = np.array(
+            [parse_approval_days(r.get("typical_approval_time", "")) for r in self.resources], dtype=float
+        )
+        self.min_credit = np.array([
+            r.get("min_credit_score") or parse_credit_minimum(r.get("eligibility_criteria", ""))
+            for r in self.resources
+        ], dtype=float)
+
+        limits = [parse_income_limit(r.get("eligibility_criteria", "")) for r in self.resources]
+        self.income_basis = np.array([basis for basis, _ in limits], dtype=int)
+        self.income_pct = np.array([pct for _, pct in limits], dtype=float)
+
+        self.category_col = np.array(
+            [category_col[r.get("category", "general")] for r in self.resources], dtype=np.intp
+        )
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def case_onehot(self, cases: List[Dict[str, Any]]) -> np.ndarray:
+        category_col = {c: i for i, c in enumerate(self.categories)}
+        onehot = np.zeros((len(cases), len(self.categories)), dtype=bool)
+        for i, case in enumerate(cases):
+            for category in case.get("categories") or []:
+                if category in category_col:
+                    onehot[i, category_col[category]] = True
+        return onehot
+
+    def eligibility(self, rows: np.ndarray, incomes: np.ndarray, credits: np.ndarray, household: np.ndarray) -> np.ndarray:
+        """Hard income and credit limits for each case against its own rows (cases x k)"""
+        household = np.clip(household, 1, None)
+        fpl = FPL_BASE + FPL_PER_PERSON * (household - 1)
+        adjust = AMI_HOUSEHOLD_ADJUST[np.clip(household, 1, len(AMI_HOUSEHOLD_ADJUST)).astype(int) - 1]
+        ami = AMI_BASE * adjust
+
+        basis = self.income_basis[rows]
+        pct = self.income_pct[rows] / 100
+        limit = np.where(basis == BASIS_FPL, fpl[:, None] * pct, np.inf)
+        limit = np.where(basis == BASIS_AMI, ami[:, None] * pct, limit)
+
+        return (incomes[:, None] <= limit) & (credits[:, None] >= self.min_credit[rows])
+
+    def gather(self, retrieved: List[Tuple[List[str], List[float]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vector-search hits as (cases x k) catalog rows and distances
+
+        k is the most hits any case has; missing or unknown hits are row -1
+        with an infinite distance.
+        """
+        k = max((len(ids) for ids, _ in retrieved), default=0)
+        rows = np.full((len(retrieved), k), -1, dtype=np.intp)
+        distances = np.full((len(retrieved), k), np.inf)
+        for i, (ids, dists) in enumerate(retrieved):
+            for j, (rid, dist) in enumerate(zip(ids, dists)):
+                row = self.index.get(rid, -1)
+                if row >= 0:
+                    rows[i, j] = row
+                    distances[i, j] = dist
+        return rows, distances
+
+    def rank(
+        self,
+        cases: List[Dict[str, Any]],
+        retrieved: List[Tuple[List[str], List[float]]],
+        limit: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        """Eligible retrieved resources per case, by relevance
+
+        retrieved[i] is (resource ids, distances) from the vector search for
+        cases[i]. Only those hits are scored, so work and memory are cases x
+        hits rather than cases x catalog. Each entry is {row,
+        relevance_score, estimated_success, category_match}.
+        """
+        if not cases or not len(self):
+            return [[] for _ in cases]
+
+        snapshots = [case.get("financial_snapshot") or {} for case in cases]
+        incomes = np.array([s.get("annual_income") or 0 for s in snapshots], dtype=float)
+        credits = np.array([s.get("credit_score") or 0 for s in snapshots], dtype=float)
+        household = np.array([1 + (s.get("dependents") or 0) for s in snapshots], dtype=int)
+
+        rows, distances = self.gather(retrieved)
+        found = rows >= 0
+        rows = np.where(found, rows, 0)
+
+        relevance = np.maximum(0, 1 - distances / 2)
+        estimated_success = self.success_rate[rows] * 0.7 + (credits[:, None] / 850) * 0.3
+        category_match = np.take_along_axis(self.case_onehot(cases), self.category_col[rows], axis=1)
+
+        candidates = found & self.eligibility(rows, incomes, credits, household)
+        order = np.argsort(np.where(candidates, -relevance, np.inf), axis=1, kind="stable")[:, :limit]
+
+        ranked = []
+        for i, hits in enumerate(order):
+            ranked.append([
+                {
+                    "row": int(rows[i, j]),
+                    "relevance_score": float(relevance[i, j]),
+                    "estimated_success": float(estimated_success[i, j]),
+                    "category_match": bool(category_match[i, j])
+                }
+                for j in hits if candidates[i, j]
+            ])
+        return ranked
+
+# Global instance
+resource_matrix = ResourceMatrix()
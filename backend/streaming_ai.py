@@ -1,13 +1,6 @@
-from groq import Groq
-import os
 import json
 from typing import AsyncGenerator
-
-def get_client():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY not set")
-    return Groq(api_key=api_key)
+from llm_client import llm_client
 
 async def stream_analyze_message(message: str, case_context: dict) -> AsyncGenerator[str, None]:
     """Stream AI analysis in real-time"""
@@ -27,23 +20,11 @@ Return ONLY valid JSON:
   "red_flags": ["flag"]
 }}"""
 
-    client = get_client()
-    
     try:
-        stream = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=800,
-            stream=True
-        )
-        
         accumulated = ""
-        for chunk in stream:
-            if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                accumulated += content
-                yield f"data: {json.dumps({'token': content})}\n\n"
+        async for content in llm_client.stream(prompt, max_tokens=800, temperature=0.7):
+            accumulated += content
+            yield f"data: {json.dumps({'token': content})}\n\n"
         
         # Send final result
         try:
@@ -69,22 +50,11 @@ Resources:
 Rank top 3 as JSON array:
 [{{"resource_id": "res_1", "relevance_score": 0.9, "reasoning": "why", "estimated_success": 0.8}}]"""
 
-    client = get_client()
-    
     try:
-        stream = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000,
-            stream=True
-        )
-        
         accumulated = ""
-        for chunk in stream:
-            if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                accumulated += content
-                yield f"data: {json.dumps({'token': content})}\n\n"
+        async for content in llm_client.stream(prompt, max_tokens=1000):
+            accumulated += content
+            yield f"data: {json.dumps({'token': content})}\n\n"
         
         try:
             clean = accumulated.replace("```json", "").replace("```", "").strip()
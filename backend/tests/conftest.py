@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import create_db_engine, init_db
+from repository import CaseRepository
+
+
+def sample_case(i, urgency="medium", messages=1):
+    return {
+        "id": f"case_{i}",
+        "employee_name": f"Employee {i}",
+        "employer": "Acme Corp",
+        "urgency": urgency,
+        "categories": ["housing"],
+        "last_contact": f"2025-01-{1 + i % 28:02d}T10:00:00",
+        "status": "active",
+        "financial_snapshot": {"annual_income": 30000, "credit_score": 600},
+        "open_actions": [],
+        "messages": [
+            {"id": f"case_{i}_msg_{j}", "sender": "employee", "content": f"Message {j}",
+             "timestamp": f"2025-01-01T09:{j:02d}:00"}
+            for j in range(messages)
+        ],
+    }
+
+
+@pytest.fixture
+def make_case():
+    """Case dict in the shape the API creates, for seeding the repository"""
+    return sample_case
+
+
+@pytest.fixture
+def engine():
+    engine = create_db_engine("sqlite://")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def repository(engine):
+    return CaseRepository(sessionmaker(bind=engine, expire_on_commit=False))
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements executed on the engine, for query-count assertions"""
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
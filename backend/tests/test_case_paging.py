@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import event
+
+from repository import URGENCY_RANK, decode_cursor, encode_cursor, parse_fields
+
+
+def test_page_walks_every_case_in_urgency_order(repository, make_case):
+    repository.bulk_seed([make_case(i, urgency) for i, urgency in enumerate(["low", "critical", "medium", "high"] * 3)])
+
+    seen, cursor = [], None
+    while True:
+        cases, cursor = repository.page(5, cursor, parse_fields("urgency,message_count"))
+        seen += cases
+        if cursor is None:
+            break
+
+    assert len({c["id"] for c in seen}) == 12
+    assert [URGENCY_RANK[c["urgency"]] for c in seen] == sorted(URGENCY_RANK[c["urgency"]] for c in seen)
+    assert all(set(c) == {"id", "urgency", "message_count"} for c in seen)
+
+
+def test_page_follows_urgency_updates(repository, make_case):
+    repository.bulk_seed([make_case(1, "low"), make_case(2, "medium")])
+    repository.update("case_1", urgency="critical")
+
+    cases, _ = repository.page(10, fields=parse_fields("urgency"))
+    assert [c["id"] for c in cases] == ["case_1", "case_2"]
+
+
+def test_page_seeks_the_listing_index(engine, repository, make_case):
+    repository.bulk_seed([make_case(i) for i in range(20)])
+    _, cursor = repository.page(5)
+    assert decode_cursor(cursor, 3)[0] == URGENCY_RANK["medium"]
+
+    executed = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, parameters, *args: executed.append((statement, parameters)))
+    repository.page(5, cursor, parse_fields("urgency"))
+
+    statement, parameters = executed[0]
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+    assert "ix_cases_listing_order" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_page_rejects_bad_cursors(repository):
+    with pytest.raises(ValueError):
+        repository.page(5, "not-a-cursor")
+    with pytest.raises(ValueError):
+        repository.page(5, encode_cursor("high", "2025-01-01T00:00:00", "case_1"))
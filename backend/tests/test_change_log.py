@@ -0,0 +1,36 @@
+def test_changes_since(repository, make_case):
+    repository.create(make_case(1))
+    version = repository.current_version()
+
+    repository.set_notes("case_1", "n")
+    repository.add_message("case_1", {"id": "msg_x", "sender": "assistant", "content": "hello"})
+
+    changes = repository.changes_since(version)
+    assert changes["version"] > version
+    assert [c["id"] for c in changes["cases"]] == ["case_1"]
+    assert [m["id"] for m in changes["messages"]] == ["msg_x"]
+    assert changes["notes"] == [{"case_id": "case_1", "notes": "n"}]
+    assert repository.changes_since(changes["version"])["cases"] == []
+
+
+def test_documents_are_listed_apart_from_cases(repository, make_case):
+    repository.create(make_case(1))
+    version = repository.current_version()
+
+    repository.add_document("case_1", {"id": "doc_1", "filename": "pay.pdf", "status": "pending"})
+    repository.update_document("doc_1", status="completed", extracted_text="Pay stub")
+
+    changes = repository.changes_since(version)
+    assert [d["id"] for d in changes["documents"]] == ["doc_1"]
+    assert all("documents_text" not in case for case in changes["cases"])
+
+
+def test_changes_since_pages_and_resets(repository, make_case):
+    repository.bulk_seed([make_case(i) for i in range(5)])
+
+    first = repository.changes_since(0, limit=3)
+    assert first["has_more"] and len(first["cases"]) == 3
+    rest = repository.changes_since(first["version"])
+    assert not rest["has_more"] and len(rest["cases"]) == 2
+
+    assert repository.changes_since(rest["version"] + 10)["reset"] is True
@@ -0,0 +1,68 @@
+import pytest
+
+
+def test_create_get_list(repository, make_case):
+    repository.create(make_case(1, "critical"))
+    repository.create(make_case(2))
+
+    case = repository.get("case_1")
+    assert case["employee_name"] == "Employee 1"
+    assert case["urgency"] == "critical"
+    assert [m["id"] for m in case["messages"]] == ["case_1_msg_0"]
+    assert case["last_contact"] == "2025-01-02T10:00:00"
+    assert repository.get("missing") is None
+
+    assert [c["id"] for c in repository.list()] == ["case_1", "case_2"]
+    assert repository.count() == 2
+
+
+def test_add_message_bumps_last_contact(repository, make_case):
+    repository.create(make_case(1, messages=0))
+    repository.add_message("case_1", {
+        "id": "msg_new", "sender": "assistant", "content": "hi", "timestamp": "2025-02-01T12:00:00"
+    })
+
+    case = repository.get("case_1")
+    assert [m["content"] for m in case["messages"]] == ["hi"]
+    assert case["last_contact"] == "2025-02-01T12:00:00"
+
+    with pytest.raises(KeyError):
+        repository.add_message("missing", {"id": "x", "sender": "a", "content": "b"})
+
+
+def test_notes(repository, make_case):
+    repository.create(make_case(1))
+    assert repository.get_notes("case_1") == ""
+
+    repository.set_notes("case_1", "call back Monday")
+    assert repository.get_notes("case_1") == "call back Monday"
+
+
+def test_bulk_seed(repository, make_case):
+    cases = [make_case(i, messages=2) for i in range(10)]
+    resources = [{"id": "res_1", "name": "Fund", "category": "housing", "success_rate": 0.5}]
+
+    assert repository.bulk_seed(cases, resources) == {"cases": 10, "messages": 20, "resources": 1}
+    assert repository.count() == 10
+    assert len(repository.get("case_3")["messages"]) == 2
+    assert repository.list_resources()[0]["name"] == "Fund"
+    assert repository.current_version() == 30
+
+
+def test_seed_if_empty_is_idempotent(repository, make_case):
+    cases = [make_case(i) for i in range(3)]
+    assert repository.seed_if_empty(cases) is True
+    assert repository.seed_if_empty(cases) is False
+    assert repository.count() == 3
+
+
+def test_list_query_count_does_not_grow_with_cases(repository, statements, make_case):
+    def list_queries(n):
+        repository.bulk_seed([make_case(n * 100 + i, messages=3) for i in range(n)])
+        statements.clear()
+        cases = repository.list()
+        assert all(len(case["messages"]) == 3 for case in cases)
+        return len(statements)
+
+    # One query for cases plus one per selectinload relationship
+    assert list_queries(5) == list_queries(50) == 4
@@ -0,0 +1,39 @@
+from resource_matrix import BASIS_AMI, BASIS_FPL, BASIS_NONE, ResourceMatrix, parse_credit_minimum, parse_income_limit
+
+
+def test_parse_income_limit():
+    assert parse_income_limit("Income below 150% federal poverty level") == (BASIS_FPL, 150.0)
+    assert parse_income_limit("Income at or below 80% AMI, COVID-19 related hardship") == (BASIS_AMI, 80.0)
+    assert parse_income_limit("Varies by location") == (BASIS_NONE, 0.0)
+
+
+def test_parse_income_limit_ignores_lower_bounds():
+    assert parse_income_limit("Income above 200% FPL") == (BASIS_NONE, 0.0)
+    assert parse_income_limit("Over 80% AMI") == (BASIS_NONE, 0.0)
+    assert parse_income_limit("Income above 100% FPL and below 200% FPL") == (BASIS_FPL, 200.0)
+
+
+def test_parse_credit_minimum():
+    assert parse_credit_minimum("Credit score >500, verifiable income") == 501
+    assert parse_credit_minimum("credit score 580+") == 580
+    assert parse_credit_minimum("Income below 200% FPL") == 0
+
+
+def test_rank_scores_only_eligible_retrieved_resources():
+    matrix = ResourceMatrix([
+        {"id": "low_income", "category": "housing", "success_rate": 0.5,
+         "eligibility_criteria": "Income below 150% FPL"},
+        {"id": "above_fpl", "category": "utilities", "success_rate": 0.5,
+         "eligibility_criteria": "Income above 200% FPL"},
+        {"id": "credit", "category": "debt", "success_rate": 0.5,
+         "eligibility_criteria": "Credit score >500"},
+        {"id": "not_retrieved", "category": "housing", "success_rate": 0.9},
+    ])
+    case = {"categories": ["utilities"],
+            "financial_snapshot": {"annual_income": 80000, "credit_score": 450, "dependents": 0}}
+    retrieved = [(["low_income", "above_fpl", "credit", "unknown"], [0.1, 0.4, 0.2, 0.0])]
+
+    [ranked] = matrix.rank([case], retrieved)
+    assert [matrix.ids[hit["row"]] for hit in ranked] == ["above_fpl"]
+    assert ranked[0]["category_match"] is True
+    assert ranked[0]["relevance_score"] == 0.8
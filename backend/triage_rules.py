@@ -0,0 +1,214 @@
+"""
+Triage Rules - keyword rules engine shared by /api/triage and /api/triage/stream
+All keywords are compiled into one regex so the text is scanned once
+"""
+
+import re
+from typing import Dict, List, Any, Iterable, Set, Tuple
+
+SENTIMENT_KEYWORDS = [
+    'eviction', 'desperate', 'urgent', 'help', 'crisis', 'emergency',
+    'cant', "can't", 'unable', 'shutoff', 'disconnect'
+]
+
+# (category, keywords) - checked in order
+CATEGORY_RULES = [
+    ('housing', ['eviction', 'rent', 'landlord', 'lease']),
+    ('utilities', ['bill', 'utility', 'electric', 'water', 'gas']),
+    ('medical', ['medical', 'hospital', 'doctor', 'health']),
+    ('employment', ['job', 'work', 'unemployed', 'laid off']),
+    ('debt', ['debt', 'credit', 'loan']),
+]
+
+# (red flag, keywords)
+RED_FLAG_RULES = [
+    ("⚠️ Eviction notice - immediate action required", ['eviction']),
+    ("⚠️ Legal proceedings - may need legal aid", ['court']),
+    ("⚠️ Utility disconnection threat", ['disconnect', 'shutoff', 'shut off']),
+    ("👨‍👩‍👧‍👦 Dependents involved - prioritize family stability", ['children', 'kids', 'dependents']),
+]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex for a set of literals, factored into a prefix trie
+
+    A trie-shaped pattern lets the regex engine reject most positions
+    after one character instead of trying every alternative.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here - greedily try the longer ones first
+            body = "(?:" + "|".join(branches) + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of keywords occur anywhere in a text
+
+    Same semantics as `keyword in text` for every keyword, but one regex
+    pass over the text. The pattern takes the longest keyword at each
+    position, so a hit also counts the shorter keywords inside it, and the
+    search resumes one character after the hit's start to catch overlaps.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted(set(keywords))
+        self._pattern = re.compile(_trie_pattern(self.keywords))
+        self._contained = {
+            keyword: {other for other in self.keywords if other in keyword}
+            for keyword in self.keywords
+        }
+
+    def scan(self, text: str) -> Set[str]:
+        hits: Set[str] = set()
+        search = self._pattern.search
+        match = search(text)
+        while match:
+            keyword = match.group()
+            if keyword not in hits:
+                hits |= self._contained[keyword]
+                if len(hits) == len(self.keywords):
+                    break
+            match = search(text, match.start() + 1)
+        return hits
+
+
+class TriageEngine:
+
+    def __init__(
+        self,
+        sentiment_keywords: List[str] = SENTIMENT_KEYWORDS,
+        category_rules: List[Tuple[str, List[str]]] = CATEGORY_RULES,
+        red_flag_rules: List[Tuple[str, List[str]]] = RED_FLAG_RULES,
+    ):
+        self.sentiment_keywords = sentiment_keywords
+        self.category_rules = category_rules
+        self.red_flag_rules = red_flag_rules
+
+        keywords = list(sentiment_keywords)
+        for _, rule_keywords in category_rules + red_flag_rules:
+            keywords.extend(rule_keywords)
+        self.matcher = KeywordMatcher(keywords)
+
+    def scan(self, text: str) -> Set[str]:
+        """Keywords present in the (lowercased) text"""
+        return self.matcher.scan(text.lower())
+
+    def sentiment(self, hits: Set[str]) -> Tuple[str, int, int]:
+        """(sentiment, sentiment_score, priority_score)"""
+        sentiment_score = sum(1 for word in self.sentiment_keywords if word in hits)
+
+        if sentiment_score >= 3:
+            return "highly distressed", sentiment_score, 9
+        if sentiment_score >= 2:
+            return "concerned", sentiment_score, 7
+        return "neutral", sentiment_score, 5
+
+    def categories(self, hits: Set[str]) -> List[str]:
+        categories = [
+            category for category, keywords in self.category_rules
+            if any(word in hits for word in keywords)
+        ]
+        return categories or ['general']
+
+    def red_flags(self, hits: Set[str]) -> List[str]:
+        return [
+            flag for flag, keywords in self.red_flag_rules
+            if any(word in hits for word in keywords)
+        ]
+
+    @staticmethod
+    def urgency(red_flags: List[str], sentiment_score: int) -> str:
+        if red_flags or sentiment_score >= 3:
+            return "critical"
+        if sentiment_score >= 2:
+            return "high"
+        return "medium"
+
+    @staticmethod
+    def build_result(
+        urgency: str,
+        priority_score: int,
+        sentiment: str,
+        categories: List[str],
+        red_flags: List[str],
+    ) -> Dict[str, Any]:
+        if urgency == "critical":
+            suggested_response = f"I understand this is urgent. Let me help you right away. I'm looking into emergency programs for {categories[0]}. Can you tell me the specific deadline?"
+        else:
+            suggested_response = f"Thank you for reaching out. I can help with {', '.join(categories)}. Let's find the best solution together."
+
+        return {
+            'urgency': urgency,
+            'priority_score': priority_score,
+            'sentiment': sentiment,
+            'categories': categories,
+            'red_flags': red_flags,
+            'suggested_response': suggested_response,
+            'reasoning': f"Detected {sentiment} tone with {len(red_flags)} urgent indicators. Categories: {', '.join(categories)}."
+        }
+
+    def analyze_hits(self, hits: Set[str]) -> Dict[str, Any]:
+        sentiment, sentiment_score, priority_score = self.sentiment(hits)
+        categories = self.categories(hits)
+        red_flags = self.red_flags(hits)
+        urgency = self.urgency(red_flags, sentiment_score)
+        return self.build_result(urgency, priority_score, sentiment, categories, red_flags)
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        return self.analyze_hits(self.scan(text))
+
+
+class DocumentKeywordIndex:
+    """Per-case keyword hits for uploaded documents
+
+    Each document is scanned once, when its text is appended to
+    case["documents_text"], so triage only has to scan the new message.
+    """
+
+    def __init__(self, engine: TriageEngine):
+        self.engine = engine
+        # case id -> keyword hits for each indexed document, in order
+        self._documents: Dict[str, List[Set[str]]] = {}
+        # case id -> union of the above
+        self._hits: Dict[str, Set[str]] = {}
+
+    def refresh(self, case: Dict[str, Any]) -> Set[str]:
+        """Scan any documents appended since the last refresh"""
+        documents = case.get("documents_text") or []
+        indexed = self._documents.setdefault(case["id"], [])
+        hits = self._hits.setdefault(case["id"], set())
+
+        for doc in documents[len(indexed):]:
+            doc_hits = self.engine.scan(doc["text"])
+            indexed.append(doc_hits)
+            hits |= doc_hits
+        return hits
+
+    def hits(self, case: Dict[str, Any]) -> Set[str]:
+        return self.refresh(case)
+
+    def document_hits(self, case_id: str) -> List[Set[str]]:
+        return self._documents.get(case_id, [])
+
+    def remove_case(self, case_id: str):
+        self._documents.pop(case_id, None)
+        self._hits.pop(case_id, None)
+
+
+# Global instances
+triage_engine = TriageEngine()
+document_keywords = DocumentKeywordIndex(triage_engine)
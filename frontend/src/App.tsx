@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { AlertCircle, TrendingUp, Users, DollarSign, Clock, MessageSquare, Search, ChevronRight, Loader2, Sparkles, Upload, FileText, X, Zap } from 'lucide-react';
 import PatternInsights from './components/PatternInsights';
 import ConversationAssistant from './components/ConversationAssistant';
@@ -72,9 +72,36 @@ interface Document {
   filename: string;
   file_type: string;
   uploaded_at: string;
+  status?: 'pending' | 'completed' | 'failed';
   has_text: boolean;
 }
 
+interface CaseChanges {
+  version: number;
+  has_more: boolean;
+  reset: boolean;
+  cases: Omit<Case, 'messages'>[];
+  messages: Message[];
+}
+
+// Merge a change-log delta into the cases on screen
+const applyChanges = (list: Case[], changes: CaseChanges): Case[] => {
+  const merge = (c: Case): Case => {
+    const updated = changes.cases.find((u) => u.id === c.id);
+    const added = changes.messages.filter(
+      (m) => m.case_id === c.id && !c.messages.some((existing) => existing.id === m.id)
+    );
+    if (!updated && added.length === 0) return c;
+    return { ...c, ...updated, messages: [...c.messages, ...added] };
+  };
+  // Cases created by another client or worker are appended, with their messages
+  const known = new Set(list.map((c) => c.id));
+  const created = changes.cases
+    .filter((u) => !known.has(u.id))
+    .map((u) => merge({ ...u, messages: [] }));
+  return [...list.map(merge), ...created];
+};
+
 interface UrgencyBadgeProps {
   level: 'critical' | 'high' | 'medium' | 'low';
 }
@@ -115,6 +142,8 @@ const Dashboard: React.FC = () => {
   const [sendingMessage, setSendingMessage] = useState(false);
   const [caseNotes, setCaseNotes] = useState<{[key: string]: string}>({});
   const [savingNotes, setSavingNotes] = useState(false);
+  // Change-log version the case list reflects; /api/cases/changes returns what came after
+  const changeVersion = useRef(0);
   
   // New state for create case
   const [showCreateModal, setShowCreateModal] = useState(false);
@@ -138,6 +167,7 @@ const Dashboard: React.FC = () => {
         fetch(`${API_BASE}/api/cases`),
         fetch(`${API_BASE}/api/analytics`)
       ]);
+      changeVersion.current = Number(casesRes.headers.get('X-Change-Version')) || 0;
       setCases(await casesRes.json());
       setAnalytics(await analyticsRes.json());
     } catch (error) {
@@ -148,6 +178,20 @@ const Dashboard: React.FC = () => {
     }
   };
 
+  // Pull only what changed since the last load instead of the whole case list
+  const syncChanges = async () => {
+    const res = await fetch(`${API_BASE}/api/cases/changes?since=${changeVersion.current}`);
+    if (!res.ok) return;
+    const changes: CaseChanges = await res.json();
+    if (changes.has_more || changes.reset) {
+      await loadData();
+      return;
+    }
+    changeVersion.current = changes.version;
+    setCases((prev) => applyChanges(prev, changes));
+    setSelectedCase((prev) => (prev ? applyChanges([prev], changes)[0] : prev));
+  };
+
   const createCase = async () => {
     // Validate
     if (!newCase.employee_name || !newCase.employer) {
@@ -383,20 +427,14 @@ const Dashboard: React.FC = () => {
       const result = await res.json();
       
       if (result.success) {
-        alert(`✅ File uploaded! ${result.extracted_text_preview ? 'Text extracted from document.' : ''}`);
+        alert(`✅ File uploaded! ${result.status === 'pending' ? 'Extracting text in the background.' : ''}`);
         
         // Reload documents immediately
         const docsRes = await fetch(`${API_BASE}/api/case/${selectedCase.id}/documents`);
         setDocuments(await docsRes.json());
         
-        // Reload the entire case to get updated documents_text
-        const casesRes = await fetch(`${API_BASE}/api/cases`);
-        const updatedCases = await casesRes.json();
-        setCases(updatedCases);
-        const updatedCase = updatedCases.find((c: Case) => c.id === selectedCase.id);
-        if (updatedCase) {
-          setSelectedCase(updatedCase);
-        }
+        // Advance past the upload in the change log and refresh the case's fields
+        await syncChanges();
       }
     } catch (error) {
       console.error('Upload error:', error);
@@ -431,14 +469,7 @@ const Dashboard: React.FC = () => {
       });
       
       if (res.ok) {
-        const casesRes = await fetch(`${API_BASE}/api/cases`);
-        const updatedCases = await casesRes.json();
-        setCases(updatedCases);
-        
-        const updatedCase = updatedCases.find((c: Case) => c.id === selectedCase.id);
-        if (updatedCase) {
-          setSelectedCase(updatedCase);
-        }
+        await syncChanges();
         
         setResponseMessage('');
         alert('✅ Message sent!');
@@ -712,6 +743,8 @@ const Dashboard: React.FC = () => {
                             <p className="text-sm font-medium text-gray-900">{doc.filename}</p>
                             <p className="text-xs text-gray-500">
                               Uploaded {new Date(doc.uploaded_at).toLocaleDateString()}
+                              {doc.status === 'pending' && <span className="ml-2 text-amber-600">• Extracting text...</span>}
+                              {doc.status === 'failed' && <span className="ml-2 text-red-600">• Extraction failed</span>}
                               {doc.has_text && <span className="ml-2 text-green-600">• Text extracted</span>}
                             </p>
                           </div>
@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { Sparkles, Loader2 } from 'lucide-react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
+import { Sparkles, Loader2, AlertCircle } from 'lucide-react';
 
 const API_BASE = 'http://localhost:8000';
 
@@ -8,40 +8,100 @@ interface Props {
   message: string;
 }
 
+const WS_BASE = API_BASE.replace(/^http/, 'ws');
+const RECONNECT_BASE_MS = 500;
+const RECONNECT_MAX_MS = 10000;
+// 4000+ close codes are the server's answer (e.g. 4404 case not found) - retrying won't help
+const APP_CLOSE_CODE_MIN = 4000;
+
 const ConversationAssistant: React.FC<Props> = ({ caseId, message }) => {
   const [suggestions, setSuggestions] = useState<string[]>([]);
   const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+  const socketRef = useRef<WebSocket | null>(null);
+  const seqRef = useRef(0);
+  // Latest draft still waiting for suggestions - sent again whenever the socket (re)opens
+  const pendingRef = useRef<string | null>(null);
+
+  const sendDraft = useCallback((draft: string) => {
+    pendingRef.current = draft;
+    const socket = socketRef.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+
+    seqRef.current += 1;
+    socket.send(JSON.stringify({ seq: seqRef.current, message: draft }));
+  }, []);
 
+  // One assist channel per case - the server debounces and drops stale drafts
   useEffect(() => {
-    // Debounce the API call
-    const timer = setTimeout(() => {
-      if (message.trim().length > 5) {
-        getSuggestions();
-      } else {
-        setSuggestions([]);
-      }
-    }, 1000);
+    let closed = false;
+    let retries = 0;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    setError(null);
 
-    return () => clearTimeout(timer);
-  }, [message, caseId]);
+    const connect = () => {
+      const socket = new WebSocket(`${WS_BASE}/ws/conversation/assist/${caseId}`);
+      socket.onopen = () => {
+        retries = 0;
+        if (pendingRef.current) sendDraft(pendingRef.current);
+      };
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.seq !== seqRef.current) return;
+        pendingRef.current = null;
+        setSuggestions(data.suggestions || []);
+        setLoading(false);
+      };
+      socket.onerror = (error) => {
+        console.error('Assist channel error:', error);
+      };
+      socket.onclose = (event) => {
+        if (closed) return;
+        if (event.code >= APP_CLOSE_CODE_MIN) {
+          pendingRef.current = null;
+          setLoading(false);
+          setError(event.reason || 'Writing assistant unavailable for this case');
+          return;
+        }
+        // Reconnect with exponential backoff; onopen resends the pending draft
+        retryTimer = setTimeout(connect, Math.min(RECONNECT_MAX_MS, RECONNECT_BASE_MS * 2 ** retries));
+        retries += 1;
+      };
+      socketRef.current = socket;
+    };
+    connect();
 
-  const getSuggestions = async () => {
-    try {
-      setLoading(true);
-      const res = await fetch(`${API_BASE}/api/conversation/assist`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ case_id: caseId, message })
-      });
-      const data = await res.json();
-      setSuggestions(data.suggestions || []);
-    } catch (error) {
-      console.error('Failed to get suggestions:', error);
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      socketRef.current?.close();
+      socketRef.current = null;
+      pendingRef.current = null;
+    };
+  }, [caseId, sendDraft]);
+
+  useEffect(() => {
+    if (message.trim().length <= 5) {
+      // Bump seq so a late reply to an earlier draft can't bring suggestions back
+      seqRef.current += 1;
+      pendingRef.current = null;
       setSuggestions([]);
-    } finally {
       setLoading(false);
+      return;
     }
-  };
+
+    setLoading(true);
+    sendDraft(message);
+  }, [message, caseId, sendDraft]);
+
+  if (error) {
+    return (
+      <div className="flex items-center gap-2 text-sm text-red-700 bg-red-50 rounded-lg p-3 border border-red-200">
+        <AlertCircle className="w-4 h-4" />
+        {error}
+      </div>
+    );
+  }
 
   if (!message.trim() || suggestions.length === 0) {
     return null;